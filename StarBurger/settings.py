@@ -1,6 +1,11 @@
 import os
 
 import dj_database_url
+from environs import Env
+
+
+env = Env()
+env.read_env()
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -18,6 +23,7 @@ ALLOWED_HOSTS = []
 INSTALLED_APPS = [
     'foodcartapp.apps.FoodcartappConfig',
     'restaurateur.apps.RestaurateurConfig',
+    'places.apps.PlacesConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -89,7 +95,27 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
         'LOCATION': 'my_cache_table',
-    }
+    },
+    # Отдельная таблица, чтобы тысячи адресов не вытесняли из общего кэша
+    # счётчики версий каталога, баннеров и индексов.
+    'geocoder': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'geocoder_cache_table',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+    # Счётчики версий каталога, баннеров и индексов. Ключей здесь единицы,
+    # и их нельзя терять: сброшенный счётчик прячет изменения от процессов.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'versions_cache_table',
+    },
+    # Снимки ответов можно пересобрать, поэтому им не страшна чистка.
+    'snapshots': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'snapshots_cache_table',
+    },
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -119,6 +145,50 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+YANDEX_GEOCODER_APIKEY = env.str('APIKEY', '')
+GEOCODER_BACKEND = env.str('GEOCODER_BACKEND', 'places.geocoder.YandexGeocoder')
+GEOCODER_CACHE_ALIAS = 'geocoder'
+VERSIONS_CACHE_ALIAS = 'versions'
+SNAPSHOTS_CACHE_ALIAS = 'snapshots'
+GEOCODER_LRU_SIZE = 1024
+GEOCODER_CACHE_TTL = 60 * 60 * 24 * 30
+GEOCODER_NEGATIVE_CACHE_TTL = 60 * 60 * 24
+GEOCODER_TIMEOUT = 5
+GEOCODER_RETRIES = 3
+GEOCODER_BACKOFF_FACTOR = 0.3
+GEOCODER_MAX_WORKERS = 8
+GEOCODER_BATCH_DEADLINE = 30
+
+ORDERS_PAGE_SIZE = env.int('ORDERS_PAGE_SIZE', 50)
+ORDERS_MAX_PAGE_SIZE = 200
+ORDER_RESTAURANTS_LIMIT = 10
+ORDERS_ADMIN_MAX_COUNT = 10000
+ORDERS_BATCH_MAX_SIZE = 1000
+ORDERS_BATCH_CHUNK_SIZE = 100
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+ORDER_EVENTS_POLL_INTERVAL = 1
+ORDER_EVENTS_STREAM_TIMEOUT = 5
+ORDER_EVENTS_RETRY_MS = 2000
+ORDER_EVENTS_TTL = 60 * 60 * 24
+
+PRODUCT_IMAGE_WIDTHS = [100, 400, 800]
+PRODUCT_IMAGE_DEFAULT_WIDTH = 400
+PRODUCT_IMAGE_THUMBNAIL_WIDTH = 100
+PRODUCTS_PAGE_SIZE = 50
+PRODUCTS_MAX_PAGE_SIZE = 200
+PRODUCT_SEARCH_LIMIT = 20
+PRODUCT_SEARCH_MAX_LIMIT = 100
+INDEX_VERSION_CHECK_INTERVAL = 1
+DELIVERY_RADIUS_KM = env.float('DELIVERY_RADIUS_KM', 10)
+DELIVERY_GRID_CELL_KM = DELIVERY_RADIUS_KM
+DELIVERY_GEODESIC_DISTANCES = env.bool('DELIVERY_GEODESIC_DISTANCES', False)
+DELIVERY_SNAPSHOTS_LRU_SIZE = 64
+BANNER_IMAGE_WIDTHS = [800, 1600]
+BANNER_IMAGE_DEFAULT_WIDTH = 1600
+BANNERS_CACHE_MAX_AGE = 60 * 5
+CATALOG_TOMBSTONE_TTL = 60 * 60 * 24 * 30
+CATALOG_CHANGES_PAGE_SIZE = 1000
+
 INTERNAL_IPS = [
     '127.0.0.1'
 ]
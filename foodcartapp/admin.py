@@ -1,10 +1,15 @@
+from django.conf import settings
 from django.contrib import admin
 from django.utils.html import format_html
 from django.shortcuts import reverse
 from django.http import HttpResponseRedirect
 from .models import Restaurant, Product, RestaurantMenuItem
-from .models import ProductCategory, Order, OrderProductItem
+from .models import ProductCategory, Order, OrderProductItem, Banner
 from django.utils.http import is_safe_url
+from django.utils.translation import ngettext
+from .changelists import DateHierarchyChangeList
+from .order_events import publish_order_events
+from .paginators import CappedCountPaginator
 
 
 class OrderProductItemInline(admin.TabularInline):
@@ -14,9 +19,65 @@ class OrderProductItemInline(admin.TabularInline):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ['firstname', 'lastname', 'address', 'phonenumber']
+    list_display = [
+        'id',
+        'firstname',
+        'lastname',
+        'address',
+        'phonenumber',
+        'status',
+        'payment_method',
+        'total',
+        'restaurant',
+        'registrated_at',
+    ]
+    list_select_related = ['restaurant']
+    list_filter = ['status', 'payment_method']
+    date_hierarchy = 'registrated_at'
+    ordering = ['-registrated_at', '-id']
+    readonly_fields = ['total']
+    raw_id_fields = ['restaurant']
+    show_full_result_count = False
     inlines = [OrderProductItemInline]
 
+    def get_changelist(self, request, **kwargs):
+        return DateHierarchyChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return CappedCountPaginator(
+            queryset, per_page, max_count=settings.ORDERS_ADMIN_MAX_COUNT,
+            orphans=orphans, allow_empty_first_page=allow_empty_first_page)
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        context = getattr(response, 'context_data', None) or {}
+        cl = context.get('cl')
+        if cl is not None and cl.paginator.is_capped:
+            selection_note_all = ngettext(
+                '%(total_count)s selected',
+                'All %(total_count)s selected',
+                cl.result_count,
+            )
+            context['selection_note_all'] = selection_note_all % {
+                'total_count': cl.paginator.display_count,
+            }
+        return response
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        publish_order_events([form.instance.id])
+
+    def delete_model(self, request, obj):
+        order_id = obj.id
+        super().delete_model(request, obj)
+        publish_order_events([order_id])
+
+    def delete_queryset(self, request, queryset):
+        order_ids = list(queryset.values_list('id', flat=True))
+        super().delete_queryset(request, queryset)
+        publish_order_events(order_ids)
+
     def response_change(self, request, obj):
         result = super().response_change(request, obj)
         if "next" in request.GET:
@@ -45,6 +106,7 @@ class RestaurantAdmin(admin.ModelAdmin):
         'name',
         'address',
         'contact_phone',
+        'capacity',
     ]
     inlines = [
         RestaurantMenuItemInline
@@ -108,17 +170,37 @@ class ProductAdmin(admin.ModelAdmin):
     def get_image_preview(self, obj):
         if not obj.image:
             return 'выберите картинку'
-        return format_html('<img src="{url}" height="200"/>', url=obj.image.url)
+        return format_html(
+            '<picture><source srcset="{webp}" type="image/webp"><img src="{url}" height="200"/></picture>',
+            webp=obj.get_image_url(image_format='webp'), url=obj.get_image_url())
     get_image_preview.short_description = 'превью'
 
     def get_image_list_preview(self, obj):
         if not obj.image or not obj.id:
             return 'нет картинки'
         edit_url = reverse('admin:foodcartapp_product_change', args=(obj.id,))
-        return format_html('<a href="{edit_url}"><img src="{src}" height="50"/></a>', edit_url=edit_url, src=obj.image.url)
+        return format_html(
+            '<a href="{edit_url}"><picture><source srcset="{webp}" type="image/webp"><img src="{src}" height="50"/></picture></a>',
+            edit_url=edit_url, webp=obj.get_image_url(settings.PRODUCT_IMAGE_THUMBNAIL_WIDTH, 'webp'), src=obj.thumbnail_url)
     get_image_list_preview.short_description = 'превью'
 
 
 @admin.register(ProductCategory)
 class ProductAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(Banner)
+class BannerAdmin(admin.ModelAdmin):
+    list_display = ['get_image_list_preview', 'title', 'text', 'position', 'is_active']
+    list_display_links = ['title']
+    list_editable = ['position', 'is_active']
+
+    def get_image_list_preview(self, obj):
+        if not obj.image:
+            return 'нет картинки'
+        return format_html(
+            '<picture><source srcset="{webp}" type="image/webp"><img src="{src}" height="50"/></picture>',
+            webp=obj.get_image_url(min(settings.BANNER_IMAGE_WIDTHS), 'webp'),
+            src=obj.get_image_url(min(settings.BANNER_IMAGE_WIDTHS)))
+    get_image_list_preview.short_description = 'превью'
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from places.geocoder import get_places_coords
+from places.models import normalize_address
+from .delivery import restaurant_locations
+from .menu_index import covers, menu_index, products_mask
+from .models import Order, OrderProductItem, Restaurant
+from .order_events import publish_order_events
+
+
+def get_remaining_capacities():
+    restaurants = Restaurant.objects.annotate(load=Count(
+        'orders', filter=Q(orders__status__in=Order.ACTIONABLE_STATUSES),
+    )).values_list('id', 'capacity', 'load')
+    return {
+        restaurant_id: capacity - load
+        for restaurant_id, capacity, load in restaurants
+        if capacity > load
+    }
+
+
+def get_assignment_edges(orders, grid, restaurant_masks, radius_km):
+    edges = []
+    for order_id, coords, order_mask in orders:
+        if not coords:
+            continue
+        nearby_restaurants = grid.nearby(coords, radius_km)
+        for restaurant_id, distance_km in nearby_restaurants.items():
+            if covers(restaurant_masks.get(restaurant_id, 0), order_mask):
+                edges.append((distance_km, order_id, restaurant_id))
+    return edges
+
+
+def solve_assignment(edges, capacities):
+    # Жадный алгоритм: пары заказ–ресторан перебираются от близких
+    # к дальним, заказ уходит ближайшему ресторану, где ещё есть место.
+    capacities = dict(capacities)
+    assignment = {}
+    for _, order_id, restaurant_id in sorted(edges):
+        if order_id in assignment or capacities.get(restaurant_id, 0) <= 0:
+            continue
+        assignment[order_id] = restaurant_id
+        capacities[restaurant_id] -= 1
+    return assignment
+
+
+def get_unassigned_orders():
+    orders = Order.objects.unassigned()
+    addresses = dict(orders.values_list('id', 'address'))
+    products = {}
+    order_items = OrderProductItem.objects.filter(
+        order__in=orders).values_list('order_id', 'product_id')
+    for order_id, product_id in order_items:
+        products.setdefault(order_id, []).append(product_id)
+
+    places_coords = get_places_coords(addresses.values())
+    return [
+        (
+            order_id,
+            places_coords.get(normalize_address(address)),
+            products_mask(products.get(order_id, [])),
+        )
+        for order_id, address in addresses.items()
+    ]
+
+
+def assign_orders(radius_km=None):
+    if radius_km is None:
+        radius_km = settings.DELIVERY_RADIUS_KM
+    orders = get_unassigned_orders()
+    edges = get_assignment_edges(
+        orders, restaurant_locations.get_data(), menu_index.get_masks(),
+        radius_km)
+    assignment = solve_assignment(edges, get_remaining_capacities())
+
+    orders_by_restaurant = {}
+    for order_id, restaurant_id in assignment.items():
+        orders_by_restaurant.setdefault(restaurant_id, []).append(order_id)
+
+    assigned_order_ids = []
+    with transaction.atomic():
+        for restaurant_id, order_ids in orders_by_restaurant.items():
+            # Заказы, которые менеджер успел назначить вручную, не трогаем.
+            restaurant_order_ids = list(
+                Order.objects.unassigned().select_for_update().filter(
+                    id__in=order_ids).values_list('id', flat=True))
+            Order.objects.filter(id__in=restaurant_order_ids).update(
+                restaurant_id=restaurant_id)
+            assigned_order_ids += restaurant_order_ids
+        publish_order_events(assigned_order_ids)
+    return {
+        'orders': len(orders),
+        'candidates': len(edges),
+        'assigned': len(assigned_order_ids),
+    }
@@ -0,0 +1,30 @@
+from .models import Banner
+from .snapshots import bump_version, get_snapshot, get_version
+
+
+def bump_banners_version():
+    return bump_version('banners')
+
+
+def get_banners_version():
+    return get_version('banners')
+
+
+def serialize_banner(banner):
+    return {
+        'title': banner.title,
+        'src': banner.get_image_url(),
+        'images': banner.get_image_urls(),
+        'text': banner.text,
+    }
+
+
+def build_banners():
+    return [
+        serialize_banner(banner)
+        for banner in Banner.objects.filter(is_active=True)
+    ]
+
+
+def get_banners_snapshot(banners_version):
+    return get_snapshot('banners', banners_version, build_banners)
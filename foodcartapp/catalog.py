@@ -0,0 +1,122 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Product
+from .snapshots import build_snapshot, bump_version, get_snapshot, get_version
+from .snapshots import make_snapshot
+
+
+def bump_catalog_version():
+    return bump_version('catalog')
+
+
+def get_catalog_version():
+    return get_version('catalog')
+
+
+def serialize_category(product):
+    if not product.category:
+        return None
+    return {
+        'id': product.category.id,
+        'name': product.category.name,
+    }
+
+
+# поле ответа -> (колонки для only(), функция сериализации)
+PRODUCT_FIELDS = {
+    'id': (['id'], lambda product: product.id),
+    'name': (['name'], lambda product: product.name),
+    'price': (['price'], lambda product: product.price),
+    'special_status': (
+        ['special_status'], lambda product: product.special_status),
+    'ingridients': (['ingridients'], lambda product: product.ingridients),
+    'category': (['category__id', 'category__name'], serialize_category),
+    'image': (
+        ['image', 'image_hash'], lambda product: product.get_image_url()),
+    'images': (['image_hash'], lambda product: product.get_image_urls()),
+    'restaurant': (['id', 'name'], lambda product: {
+        'id': product.id,
+        'name': product.name,
+    }),
+}
+
+
+def get_product_columns(fields):
+    columns = {'id'}
+    if 'category' in fields:
+        columns.add('category')
+    for field in fields:
+        columns.update(PRODUCT_FIELDS[field][0])
+    return sorted(columns)
+
+
+def serialize_product(product, fields=PRODUCT_FIELDS):
+    return {field: PRODUCT_FIELDS[field][1](product) for field in fields}
+
+
+def get_catalog_page(fields=PRODUCT_FIELDS, category_id=None, after_id=None,
+                     limit=50, restaurant_ids=None):
+    products = Product.objects.available().only(
+        *get_product_columns(fields)).order_by('id')
+    if restaurant_ids is not None:
+        products = products.deliverable_from(restaurant_ids)
+    if 'category' in fields:
+        products = products.select_related('category')
+    if category_id is not None:
+        products = products.filter(category_id=category_id)
+    if after_id is not None:
+        products = products.filter(id__gt=after_id)
+
+    products = list(products[:limit + 1])
+    next_after_id = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_after_id = products[-1].id
+    serialized_products = [
+        serialize_product(product, fields) for product in products
+    ]
+    return serialized_products, next_after_id
+
+
+def build_catalog(restaurant_ids=None):
+    products = Product.objects.select_related('category').available()
+    if restaurant_ids is not None:
+        products = products.deliverable_from(restaurant_ids)
+    return [serialize_product(product) for product in products]
+
+
+def build_catalog_snapshot(catalog_version):
+    return build_snapshot('catalog', catalog_version, build_catalog)
+
+
+def get_catalog_snapshot(catalog_version):
+    return get_snapshot('catalog', catalog_version, build_catalog)
+
+
+_delivery_snapshots = OrderedDict()
+_delivery_snapshots_lock = threading.Lock()
+
+
+def get_delivery_catalog_snapshot(catalog_version, restaurant_ids):
+    # Соседние клиенты почти всегда попадают в радиус одних и тех же
+    # ресторанов, поэтому снимок запоминается по набору ресторанов. Наборов
+    # много, и в общем кэше они вытесняли бы всё остальное, поэтому снимки
+    # живут в памяти процесса и устаревают вместе с версией каталога.
+    key = tuple(restaurant_ids)
+    with _delivery_snapshots_lock:
+        snapshot = _delivery_snapshots.get(key)
+        if snapshot and snapshot.version == catalog_version['version']:
+            _delivery_snapshots.move_to_end(key)
+            return snapshot
+
+    snapshot = make_snapshot(
+        catalog_version, lambda: build_catalog(restaurant_ids))
+    with _delivery_snapshots_lock:
+        _delivery_snapshots[key] = snapshot
+        _delivery_snapshots.move_to_end(key)
+        while len(_delivery_snapshots) > settings.DELIVERY_SNAPSHOTS_LRU_SIZE:
+            _delivery_snapshots.popitem(last=False)
+    return snapshot
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.admin.views.main import ChangeList
+from django.db.models import Max, Min, QuerySet
+from django.utils import timezone
+
+
+def get_period_start(day, kind):
+    if kind == 'year':
+        return day.replace(month=1, day=1)
+    if kind == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def get_next_period_start(start, kind):
+    if kind == 'year':
+        return start.replace(year=start.year + 1)
+    if kind == 'month':
+        return start.replace(
+            year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + timedelta(days=1)
+
+
+def to_datetime(day):
+    moment = datetime.combine(day, datetime.min.time())
+    if settings.USE_TZ:
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def to_local_date(moment):
+    if settings.USE_TZ:
+        moment = timezone.localtime(moment)
+    return moment.date()
+
+
+class PeriodExistsQuerySet(QuerySet):
+    def dates(self, field_name, kind, order='ASC'):
+        # Иерархия дат в админке строится через DISTINCT по усечённой
+        # дате, а это чтение всей таблицы. Вместо этого проверяем каждый
+        # период отдельным EXISTS, который идёт по индексу на дату.
+        if kind not in ['year', 'month', 'day']:
+            return super().dates(field_name, kind, order)
+        first = self.aggregate(first=Min(field_name))['first']
+        if first is None:
+            return []
+        last = self.aggregate(last=Max(field_name))['last']
+
+        periods = []
+        start = get_period_start(to_local_date(first), kind)
+        last = to_local_date(last)
+        while start <= last:
+            end = get_next_period_start(start, kind)
+            period_objects = self.filter(**{
+                f'{field_name}__gte': to_datetime(start),
+                f'{field_name}__lt': to_datetime(end),
+            })
+            if period_objects.exists():
+                periods.append(start)
+            start = end
+        if order == 'DESC':
+            periods.reverse()
+        return periods
+
+
+class DateHierarchyChangeList(ChangeList):
+    # Тег date_hierarchy берёт периоды из cl.queryset.dates(). Быстрый
+    # вариант dates() подставляется только в queryset этого списка,
+    # у модели QuerySet остаётся стандартным.
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return PeriodExistsQuerySet(
+            model=queryset.model, query=queryset.query.chain(),
+            using=queryset.db)
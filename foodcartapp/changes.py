@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .catalog import serialize_product
+from .models import CatalogTombstone, Product, ProductCategory
+from .models import RestaurantMenuItem
+
+
+# Транзакции, начатые до запроса, могут закоммитить строки с более ранним
+# updated_at уже после него, поэтому окно слегка перекрывает прошлое.
+# Клиент применяет изменения идемпотентно, повторы ему не мешают.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def get_tombstones_expiration_time():
+    return timezone.now() - timedelta(seconds=settings.CATALOG_TOMBSTONE_TTL)
+
+
+def encode_cursor(moment):
+    return urlsafe_base64_encode(moment.isoformat().encode())
+
+
+def decode_cursor(cursor):
+    try:
+        moment = parse_datetime(urlsafe_base64_decode(cursor).decode())
+    except ValueError:
+        return None
+    if moment is None or timezone.is_naive(moment):
+        return None
+    return moment
+
+
+def get_removed_ids(model, since):
+    return list(CatalogTombstone.objects.filter(
+        model=model, deleted_at__gt=since).values_list('object_id', flat=True))
+
+
+FULL_SYNC_SECTIONS = ['categories', 'products', 'menu_items']
+
+
+def encode_page_cursor(until, section, after_id):
+    return urlsafe_base64_encode(
+        f'{until.isoformat()}|{section}|{after_id}'.encode())
+
+
+def decode_page_cursor(cursor):
+    try:
+        until, section, after_id = urlsafe_base64_decode(
+            cursor).decode().split('|')
+        until = parse_datetime(until)
+        after_id = int(after_id)
+    except ValueError:
+        return None
+    if until is None or timezone.is_naive(until):
+        return None
+    if section not in FULL_SYNC_SECTIONS:
+        return None
+    return until, section, after_id
+
+
+def get_section_rows(section, until, after_id, limit):
+    window = {'updated_at__lte': until, 'id__gt': after_id}
+    if section == 'products':
+        products = Product.objects.available().select_related(
+            'category').filter(**window).order_by('id')[:limit]
+        return [serialize_product(product) for product in products]
+    if section == 'categories':
+        return list(ProductCategory.objects.filter(**window).order_by(
+            'id').values('id', 'name')[:limit])
+    return list(RestaurantMenuItem.objects.filter(**window).order_by(
+        'id').values('id', 'restaurant', 'product', 'availability')[:limit])
+
+
+def get_full_catalog_page(until, section=FULL_SYNC_SECTIONS[0], after_id=0,
+                          limit=None):
+    # Полный каталог отдаётся страницами по id: сначала категории, потом
+    # товары и пункты меню. Курсор для изменений приходит только с последней
+    # страницей и указывает на начало выгрузки, так что правки, сделанные
+    # за время листания, клиент получит следующим запросом изменений.
+    limit = limit or settings.CATALOG_CHANGES_PAGE_SIZE
+    page = {
+        'cursor': None,
+        'next_page': None,
+        'full': True,
+    }
+    for name in FULL_SYNC_SECTIONS:
+        page[name] = {'changed': [], 'removed': []}
+
+    sections = FULL_SYNC_SECTIONS[FULL_SYNC_SECTIONS.index(section):]
+    for section in sections:
+        rows = get_section_rows(section, until, after_id, limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        page[section]['changed'] = rows
+        if has_more:
+            if rows:
+                after_id = rows[-1]['id']
+            page['next_page'] = encode_page_cursor(until, section, after_id)
+            return page
+        limit -= len(rows)
+        after_id = 0
+    page['cursor'] = encode_cursor(until)
+    return page
+
+
+def get_catalog_changes(since=None):
+    # Записи об удалениях старше TTL вычищаются, поэтому по слишком старому
+    # курсору удаления уже не восстановить — отдаём каталог целиком.
+    until = timezone.now()
+    if since is None or since < get_tombstones_expiration_time():
+        return get_full_catalog_page(until)
+    since -= SYNC_OVERLAP
+    window = {'updated_at__gt': since, 'updated_at__lte': until}
+
+    products = Product.objects.select_related('category').filter(**window)
+    changed_products = []
+    removed_products = get_removed_ids('product', since)
+    for product in products:
+        if product.available_restaurants_count:
+            changed_products.append(serialize_product(product))
+        else:
+            removed_products.append(product.id)
+
+    categories = ProductCategory.objects.filter(**window)
+    menu_items = RestaurantMenuItem.objects.filter(**window)
+
+    return {
+        'cursor': encode_cursor(until),
+        'next_page': None,
+        'full': False,
+        'products': {
+            'changed': changed_products,
+            'removed': removed_products,
+        },
+        'categories': {
+            'changed': list(categories.values('id', 'name')),
+            'removed': get_removed_ids('category', since),
+        },
+        'menu_items': {
+            'changed': list(menu_items.values(
+                'id', 'restaurant', 'product', 'availability')),
+            'removed': get_removed_ids('menu_item', since),
+        },
+    }
@@ -0,0 +1,54 @@
+from django.conf import settings
+
+from places.geocoder import get_places_coords
+from places.grid import GridIndex
+from places.models import normalize_address
+from .menu_index import menu_index
+from .models import Restaurant
+from .versioned_index import VersionedIndex
+
+
+class RestaurantLocationIndex(VersionedIndex):
+    version_key = 'restaurant-location-index-version'
+
+    def build(self):
+        restaurants = list(Restaurant.objects.values_list('id', 'address'))
+        places_coords = get_places_coords(
+            [address for _, address in restaurants])
+        grid = GridIndex(settings.DELIVERY_GRID_CELL_KM)
+        for restaurant_id, address in restaurants:
+            coords = places_coords.get(normalize_address(address))
+            if coords:
+                grid.add(restaurant_id, coords)
+        return grid
+
+    def restaurants_within(self, point, radius_km):
+        return self.get_data().nearby(point, radius_km)
+
+    def nearest(self, point, radius_km, k=None, predicate=None):
+        return self.get_data().nearest(
+            point, radius_km, k, predicate,
+            geodesic=settings.DELIVERY_GEODESIC_DISTANCES)
+
+    def update(self, restaurant_id, coords):
+        def change(grid):
+            if coords:
+                grid.add(restaurant_id, coords)
+            else:
+                grid.remove(restaurant_id)
+        self.apply(change)
+
+
+restaurant_locations = RestaurantLocationIndex()
+
+
+def get_delivering_restaurants(point, radius_km=None):
+    if radius_km is None:
+        radius_km = settings.DELIVERY_RADIUS_KM
+    masks = menu_index.get_masks()
+    return sorted(
+        restaurant_id
+        for restaurant_id in restaurant_locations.restaurants_within(
+            point, radius_km)
+        if masks.get(restaurant_id)
+    )
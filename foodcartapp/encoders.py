@@ -0,0 +1,121 @@
+import gzip
+import itertools
+import json
+from collections import namedtuple
+
+import msgpack
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'msgpack': 'application/msgpack',
+}
+MSGPACK_MEDIA_TYPES = ['application/msgpack', 'application/x-msgpack']
+
+Representation = namedtuple(
+    'Representation', ['format', 'pretty', 'content_encoding'])
+
+REPRESENTATIONS = [
+    Representation(data_format, pretty, content_encoding)
+    for (data_format, pretty), content_encoding in itertools.product(
+        [('json', False), ('json', True), ('msgpack', False)],
+        ['identity', 'gzip'],
+    )
+]
+
+
+def parse_quality_values(header):
+    qualities = {}
+    for item in header.split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+        name = name.lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = max(qualities.get(name, 0.0), quality)
+    return qualities
+
+
+def get_quality(qualities, name, wildcards=()):
+    if name in qualities:
+        return qualities[name]
+    for wildcard in wildcards:
+        if wildcard in qualities:
+            return qualities[wildcard]
+    return 0.0
+
+
+def get_representation(request):
+    accept = parse_quality_values(request.META.get('HTTP_ACCEPT', ''))
+    data_format = 'json'
+    msgpack_quality = max(
+        get_quality(accept, media_type) for media_type in MSGPACK_MEDIA_TYPES)
+    json_quality = get_quality(
+        accept, 'application/json', ['application/*', '*/*'])
+    if msgpack_quality > 0 and msgpack_quality >= json_quality:
+        data_format = 'msgpack'
+
+    pretty = (
+        data_format == 'json' and
+        request.GET.get('pretty', '').lower() in ['1', 'true', 'yes']
+    )
+
+    content_encoding = 'identity'
+    accept_encoding = parse_quality_values(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if get_quality(accept_encoding, 'gzip', ['*']) > 0:
+        content_encoding = 'gzip'
+    return Representation(data_format, pretty, content_encoding)
+
+
+def get_representation_tag(representation):
+    tag = representation.format
+    if representation.pretty:
+        tag += '-pretty'
+    return f'{tag}-{representation.content_encoding}'
+
+
+def msgpack_default(obj):
+    return DjangoJSONEncoder().default(obj)
+
+
+def encode(data, representation, compresslevel=6):
+    if representation.format == 'msgpack':
+        body = msgpack.packb(data, default=msgpack_default, use_bin_type=True)
+    elif representation.pretty:
+        body = json.dumps(
+            data, cls=DjangoJSONEncoder, ensure_ascii=False, indent=4).encode()
+    else:
+        body = json.dumps(
+            data, cls=DjangoJSONEncoder, ensure_ascii=False,
+            separators=(',', ':')).encode()
+
+    if representation.content_encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=compresslevel)
+    return body
+
+
+def encode_all(data):
+    return {
+        representation: encode(data, representation, compresslevel=9)
+        for representation in REPRESENTATIONS
+    }
+
+
+def encoded_response(representation, body):
+    response = HttpResponse(
+        body, content_type=CONTENT_TYPES[representation.format])
+    if representation.content_encoding != 'identity':
+        response['Content-Encoding'] = representation.content_encoding
+    patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+    return response
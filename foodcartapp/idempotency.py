@@ -0,0 +1,57 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+def get_fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_expiration_time():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def idempotent(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+        if not key:
+            return view(request, *args, **kwargs)
+
+        fingerprint = get_fingerprint(request)
+        record, created = IdempotencyKey.objects.select_for_update(
+        ).get_or_create(key=key, defaults={'fingerprint': fingerprint})
+
+        if not created and record.created_at < get_expiration_time():
+            record.fingerprint = fingerprint
+            record.response_status = None
+            record.response_body = ''
+            record.created_at = timezone.now()
+            created = True
+
+        if not created:
+            if record.fingerprint != fingerprint:
+                return Response(
+                    'Idempotency-Key was already used with another request',
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            return Response(
+                json.loads(record.response_body),
+                status=record.response_status)
+
+        response = view(request, *args, **kwargs)
+        record.response_status = response.status_code
+        record.response_body = JSONRenderer().render(
+            response.data).decode()
+        record.save()
+        return response
+    return wrapper
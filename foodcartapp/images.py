@@ -0,0 +1,79 @@
+import hashlib
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+
+DERIVATIVE_FORMATS = {
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+}
+# UnidentifiedImageError и отсутствующий файл — это OSError
+IMAGE_ERRORS = (OSError, ValueError, Image.DecompressionBombError)
+
+
+def get_content_hash(content):
+    return hashlib.sha1(content).hexdigest()[:16]
+
+
+def get_derivative_name(image_hash, width, image_format):
+    return f'derivatives/{image_hash}-{width}.{image_format}'
+
+
+def get_derivative_url(image_hash, width, image_format='jpeg'):
+    return default_storage.url(
+        get_derivative_name(image_hash, width, image_format))
+
+
+def get_derivative_urls(image_hash, widths):
+    return {
+        image_format: {
+            str(width): get_derivative_url(image_hash, width, image_format)
+            for width in widths
+        }
+        for image_format in DERIVATIVE_FORMATS
+    }
+
+
+def get_image_url(image, image_hash, width, image_format='jpeg'):
+    if not image_hash:
+        return image.url
+    return get_derivative_url(image_hash, width, image_format)
+
+
+def get_image_urls(image_hash, widths):
+    if not image_hash:
+        return {}
+    return get_derivative_urls(image_hash, widths)
+
+
+def make_derivatives(image_name, widths, force=False):
+    with default_storage.open(image_name) as image_file:
+        content = image_file.read()
+    image_hash = get_content_hash(content)
+
+    largest_name = get_derivative_name(image_hash, max(widths), 'webp')
+    if default_storage.exists(largest_name) and not force:
+        return image_hash
+
+    with Image.open(io.BytesIO(content)) as original:
+        original.load()
+        for width in widths:
+            image = original.copy()
+            image.thumbnail((width, width * 4), Image.LANCZOS)
+            for image_format, (pil_format, options) in DERIVATIVE_FORMATS.items():
+                converted = image
+                if pil_format == 'JPEG' and image.mode != 'RGB':
+                    converted = image.convert('RGB')
+                elif image.mode not in ['RGB', 'RGBA']:
+                    converted = image.convert('RGBA')
+                buffer = io.BytesIO()
+                converted.save(buffer, pil_format, **options)
+
+                name = get_derivative_name(image_hash, width, image_format)
+                if default_storage.exists(name):
+                    default_storage.delete(name)
+                default_storage.save(name, ContentFile(buffer.getvalue()))
+    return image_hash
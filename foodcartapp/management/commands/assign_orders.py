@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.assignment import assign_orders
+
+
+class Command(BaseCommand):
+    help = 'Назначает необработанные заказы ресторанам. Запускайте по крону'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--radius', type=float, default=None,
+            help='радиус доставки в км, по умолчанию DELIVERY_RADIUS_KM')
+
+    def handle(self, *args, **options):
+        stats = assign_orders(options['radius'])
+        self.stdout.write(
+            f"заказов без ресторана: {stats['orders']}, "
+            f"подходящих пар: {stats['candidates']}, "
+            f"назначено: {stats['assigned']}")
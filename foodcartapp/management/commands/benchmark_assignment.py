@@ -0,0 +1,70 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.assignment import get_assignment_edges, solve_assignment
+from foodcartapp.menu_index import products_mask
+from places.grid import GridIndex
+
+
+def random_point():
+    return random.uniform(55.5, 56.0), random.uniform(37.3, 37.9)
+
+
+class Command(BaseCommand):
+    help = 'Замеряет автоматическое назначение заказов на синтетических данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=5000)
+        parser.add_argument('--restaurants', type=int, default=300)
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--capacity', type=int, default=20)
+        parser.add_argument('--radius', type=float, default=10)
+
+    def handle(self, *args, **options):
+        product_ids = range(1, options['products'] + 1)
+        restaurant_masks = {
+            restaurant_id: products_mask(random.sample(
+                product_ids, int(options['products'] * 0.8)))
+            for restaurant_id in range(1, options['restaurants'] + 1)
+        }
+        orders = [
+            (
+                order_id,
+                random_point(),
+                products_mask(random.sample(product_ids, 3)),
+            )
+            for order_id in range(1, options['orders'] + 1)
+        ]
+        capacities = dict.fromkeys(restaurant_masks, options['capacity'])
+
+        started_at = time.perf_counter()
+        grid = GridIndex(options['radius'])
+        for restaurant_id in restaurant_masks:
+            grid.add(restaurant_id, random_point())
+        index_time = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        edges = get_assignment_edges(
+            orders, grid, restaurant_masks, options['radius'])
+        edges_time = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        assignment = solve_assignment(edges, capacities)
+        solve_time = time.perf_counter() - started_at
+
+        total_distance = sum(
+            grid.nearby(coords, options['radius'])[assignment[order_id]]
+            for order_id, coords, _ in orders if order_id in assignment)
+
+        self.stdout.write(
+            f"{options['orders']} заказов × {options['restaurants']} ресторанов, "
+            f"вместимость {options['capacity']}")
+        self.stdout.write(f'сетка ресторанов: {index_time:.3f} с')
+        self.stdout.write(
+            f'подходящие пары ({len(edges)} шт.): {edges_time:.3f} с')
+        self.stdout.write(f'жадное назначение: {solve_time:.3f} с')
+        self.stdout.write(
+            f'назначено: {len(assignment)}, '
+            f'суммарное расстояние: {total_distance:.0f} км')
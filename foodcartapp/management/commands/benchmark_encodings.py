@@ -0,0 +1,50 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.encoders import REPRESENTATIONS, encode
+from foodcartapp.encoders import get_representation_tag
+
+
+def fake_product(product_id):
+    return {
+        'id': product_id,
+        'name': f'Бургер №{product_id}',
+        'price': Decimal(random.randint(100, 900)).quantize(Decimal('0.01')),
+        'special_status': random.random() < 0.1,
+        'ingridients': 'булочка, говяжья котлета, сыр чеддер, томаты, салат',
+        'category': {
+            'id': product_id % 10,
+            'name': f'Категория {product_id % 10}',
+        },
+        'image': f'/media/burger-{product_id}.jpg',
+        'restaurant': {
+            'id': product_id,
+            'name': f'Бургер №{product_id}',
+        }
+    }
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает размер и скорость кодирования каталога в разных форматах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        catalog = [
+            fake_product(product_id)
+            for product_id in range(1, options['products'] + 1)
+        ]
+        self.stdout.write(f"каталог из {options['products']} товаров")
+        for representation in REPRESENTATIONS:
+            started_at = time.perf_counter()
+            for _ in range(options['repeat']):
+                body = encode(catalog, representation)
+            elapsed_ms = (time.perf_counter() - started_at) / options['repeat'] * 1000
+            self.stdout.write(
+                f'{get_representation_tag(representation):<22}'
+                f'{len(body):>10} байт {elapsed_ms:>8.1f} мс')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.catalog import build_catalog_snapshot, get_catalog_version
+from foodcartapp.encoders import get_representation_tag
+
+
+class Command(BaseCommand):
+    help = 'Собирает снимок каталога для /api/products/ и кладёт его в кэш'
+
+    def handle(self, *args, **options):
+        snapshot = build_catalog_snapshot(get_catalog_version())
+        for representation, body in snapshot.bodies.items():
+            self.stdout.write(
+                f'{get_representation_tag(representation)}: {len(body)} байт')
@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from foodcartapp.banners import bump_banners_version
+from foodcartapp.catalog import bump_catalog_version
+from foodcartapp.images import IMAGE_ERRORS, make_derivatives
+from foodcartapp.models import Banner, Product
+
+
+class Command(BaseCommand):
+    help = 'Нарезает превью и WebP-версии картинок товаров и баннеров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument(
+            '--force', action='store_true',
+            help='пересоздать уже нарезанные картинки')
+
+    def handle(self, *args, **options):
+        sources = [
+            (Product, settings.PRODUCT_IMAGE_WIDTHS, bump_catalog_version),
+            (Banner, settings.BANNER_IMAGE_WIDTHS, bump_banners_version),
+        ]
+        for model, widths, bump_version in sources:
+            images = dict(
+                model.objects.exclude(image='').values_list('id', 'image'))
+            connections.close_all()
+            updated = self.make_derivatives(
+                model, images, widths, options['workers'], options['force'])
+            if updated:
+                bump_version()
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: обработано картинок: '
+                f'{len(images)}, обновлено: {updated}')
+
+    def make_derivatives(self, model, images, widths, workers, force):
+        updated = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(make_derivatives, image_name, widths, force): pk
+                for pk, image_name in images.items()
+            }
+            for future in as_completed(futures):
+                pk = futures[future]
+                try:
+                    image_hash = future.result()
+                except IMAGE_ERRORS as error:
+                    self.stderr.write(f'{model._meta.verbose_name} {pk}: {error}')
+                    continue
+                updated += model.objects.filter(pk=pk).exclude(
+                    image_hash=image_hash).update(
+                    image_hash=image_hash, updated_at=timezone.now())
+        return updated
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.changes import get_tombstones_expiration_time
+from foodcartapp.models import CatalogTombstone
+
+
+class Command(BaseCommand):
+    help = 'Удаляет устаревшие записи об удалениях из каталога. Запускайте по крону'
+
+    def handle(self, *args, **options):
+        deleted, _ = CatalogTombstone.objects.filter(
+            deleted_at__lt=get_tombstones_expiration_time()).delete()
+        self.stdout.write(f'удалено записей: {deleted}')
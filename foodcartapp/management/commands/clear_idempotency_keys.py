@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.idempotency import get_expiration_time
+from foodcartapp.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Удаляет просроченные ключи идемпотентности. Запускайте по крону'
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(
+            created_at__lt=get_expiration_time()).delete()
+        self.stdout.write(f'удалено ключей: {deleted}')
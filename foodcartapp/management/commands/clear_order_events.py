@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import OrderEvent
+from foodcartapp.order_events import get_expiration_time
+
+
+class Command(BaseCommand):
+    help = 'Удаляет старые события заказов. Запускайте по крону'
+
+    def handle(self, *args, **options):
+        deleted, _ = OrderEvent.objects.filter(
+            created_at__lt=get_expiration_time()).delete()
+        self.stdout.write(f'удалено событий: {deleted}')
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.catalog import bump_catalog_version
+from foodcartapp.delivery import restaurant_locations
+from foodcartapp.models import Restaurant, Order
+from places.geocoder import geocode_many
+from places.models import Place, normalize_address
+
+
+class Command(BaseCommand):
+    help = ('Геокодирует адреса ресторанов и необработанных заказов, '
+            'которых ещё нет в базе')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-errors', action='store_true',
+            help='повторно запросить адреса, на которых геокодер упал')
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def get_addresses(self):
+        # Координаты нужны только ресторанам и заказам, которые ещё ждут
+        # назначения: история заказов растёт без границ и здесь не нужна.
+        querysets = [
+            Restaurant.objects.all(),
+            Order.objects.actionable(),
+        ]
+        addresses = set()
+        for queryset in querysets:
+            for address in queryset.values_list(
+                    'address', flat=True).iterator():
+                if address:
+                    addresses.add(normalize_address(address))
+        return sorted(addresses)
+
+    def handle(self, *args, **options):
+        addresses = self.get_addresses()
+        batch_size = options['batch_size']
+        geocoded = 0
+        for start in range(0, len(addresses), batch_size):
+            batch = addresses[start:start + batch_size]
+            known = Place.objects.filter(address__in=batch)
+            if options['retry_errors']:
+                known = known.exclude(status='ERROR')
+            missing = set(batch) - set(known.values_list('address', flat=True))
+            if not missing:
+                continue
+            places = geocode_many(missing)
+            geocoded += len(places)
+            for place in places.values():
+                self.stdout.write(
+                    f'{place.address}: {place.get_status_display()}')
+
+        if geocoded:
+            restaurant_locations.invalidate()
+            bump_catalog_version()
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Сверяет сохранённые суммы заказов с товарами в заказах и исправляет их'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='только показать расхождения, ничего не исправлять')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        mismatched = Order.objects.with_totals().exclude(
+            total=F('calculated_total')).only('id', 'total').order_by('id')
+
+        mismatched_ids = []
+        for order in mismatched.iterator():
+            self.stdout.write(
+                f'заказ {order.id}: {order.total} вместо {order.calculated_total}')
+            mismatched_ids.append(order.id)
+
+        if options['check']:
+            self.stdout.write(f'расхождений: {len(mismatched_ids)}')
+            return
+
+        batch_size = options['batch_size']
+        for start in range(0, len(mismatched_ids), batch_size):
+            Order.objects.filter(
+                id__in=mismatched_ids[start:start + batch_size]).update_totals()
+        self.stdout.write(f'исправлено заказов: {len(mismatched_ids)}')
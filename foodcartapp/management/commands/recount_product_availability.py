@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.catalog import bump_catalog_version
+from foodcartapp.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает, в скольких ресторанах каждый товар есть в продаже'
+
+    def handle(self, *args, **options):
+        updated = Product.objects.update_availability_counts()
+        bump_catalog_version()
+        self.stdout.write(f'пересчитано товаров: {updated}')
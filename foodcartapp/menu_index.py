@@ -0,0 +1,41 @@
+from .models import RestaurantMenuItem
+from .versioned_index import VersionedIndex
+
+
+def products_mask(product_ids):
+    mask = 0
+    for product_id in product_ids:
+        mask |= 1 << product_id
+    return mask
+
+
+def covers(restaurant_mask, order_mask):
+    return restaurant_mask & order_mask == order_mask
+
+
+class MenuCoverageIndex(VersionedIndex):
+    version_key = 'menu-coverage-index-version'
+
+    def build(self):
+        masks = {}
+        menu_items = RestaurantMenuItem.objects.filter(
+            availability=True).values_list('restaurant_id', 'product_id')
+        for restaurant_id, product_id in menu_items:
+            masks[restaurant_id] = masks.get(restaurant_id, 0) | 1 << product_id
+        return masks
+
+    def get_masks(self):
+        return self.get_data()
+
+    def update(self, restaurant_id, product_id, available):
+        def change(masks):
+            mask = masks.get(restaurant_id, 0)
+            if available:
+                mask |= 1 << product_id
+            else:
+                mask &= ~(1 << product_id)
+            masks[restaurant_id] = mask
+        self.apply(change)
+
+
+menu_index = MenuCoverageIndex()
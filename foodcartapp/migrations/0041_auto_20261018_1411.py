@@ -0,0 +1,17 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0040_auto_20201010_2358'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'registrated_at'], name='foodcartapp_status_b4c14b_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def count_order_totals(apps, schema_editor):
+    Order = apps.get_model('foodcartapp', 'Order')
+    OrderProductItem = apps.get_model('foodcartapp', 'OrderProductItem')
+    items_total = OrderProductItem.objects.filter(
+        order=OuterRef('pk')).values('order').annotate(
+        total=Sum('product_total')).values('total')
+    Order.objects.update(total=Coalesce(
+        Subquery(items_total), Value(0), output_field=models.DecimalField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0041_auto_20261018_1411'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='стоимость заказа'),
+        ),
+        migrations.RunPython(count_order_totals, migrations.RunPython.noop),
+    ]
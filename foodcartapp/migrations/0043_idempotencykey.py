@@ -0,0 +1,29 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:14
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0042_order_total'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='ключ')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='отпечаток запроса')),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='код ответа')),
+                ('response_body', models.TextField(blank=True, verbose_name='тело ответа')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='время создания')),
+            ],
+            options={
+                'verbose_name': 'ключ идемпотентности',
+                'verbose_name_plural': 'ключи идемпотентности',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_available_restaurants(apps, schema_editor):
+    Product = apps.get_model('foodcartapp', 'Product')
+    RestaurantMenuItem = apps.get_model('foodcartapp', 'RestaurantMenuItem')
+    available_menu_items = RestaurantMenuItem.objects.filter(
+        product=OuterRef('pk'), availability=True).values(
+        'product').annotate(count=Count('pk')).values('count')
+    Product.objects.update(available_restaurants_count=Coalesce(
+        Subquery(available_menu_items), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0043_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='available_restaurants_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='ресторанов с товаром в продаже'),
+        ),
+        migrations.RunPython(
+            count_available_restaurants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0044_product_available_restaurants_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=16, verbose_name='хэш картинки'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0045_product_image_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Banner',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100, verbose_name='заголовок')),
+                ('image', models.ImageField(upload_to='banners', verbose_name='картинка')),
+                ('image_hash', models.CharField(blank=True, editable=False, max_length=16, verbose_name='хэш картинки')),
+                ('text', models.CharField(blank=True, max_length=200, verbose_name='текст')),
+                ('position', models.PositiveIntegerField(db_index=True, default=0, verbose_name='позиция')),
+                ('is_active', models.BooleanField(default=True, verbose_name='показывать')),
+            ],
+            options={
+                'verbose_name': 'баннер',
+                'verbose_name_plural': 'баннеры',
+                'ordering': ['position', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.contrib.staticfiles import finders
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import migrations
+
+
+DEFAULT_BANNERS = [
+    ('Burger', 'burger.jpg', 'Tasty Burger at your door step'),
+    ('Spices', 'food.jpg', 'All Cuisines'),
+    ('New York', 'tasty.jpg', 'Food is incomplete without a tasty dessert'),
+]
+
+
+def get_image_name(filename):
+    return f'banners/{filename}'
+
+
+def add_default_banners(apps, schema_editor):
+    Banner = apps.get_model('foodcartapp', 'Banner')
+    for position, (title, filename, text) in enumerate(DEFAULT_BANNERS):
+        image_name = get_image_name(filename)
+        if not default_storage.exists(image_name):
+            path = finders.find(filename)
+            if not path:
+                continue
+            with open(path, 'rb') as image_file:
+                image_name = default_storage.save(image_name, File(image_file))
+        Banner.objects.create(
+            title=title, text=text, position=position, image=image_name)
+
+
+def remove_default_banners(apps, schema_editor):
+    Banner = apps.get_model('foodcartapp', 'Banner')
+    titles = [title for title, _, _ in DEFAULT_BANNERS]
+    image_names = [
+        get_image_name(filename) for _, filename, _ in DEFAULT_BANNERS]
+    Banner.objects.filter(title__in=titles, image__in=image_names).delete()
+    for image_name in image_names:
+        if default_storage.exists(image_name):
+            default_storage.delete(image_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0046_banner'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_default_banners, remove_default_banners),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0047_add_default_banners'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogTombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('product', 'товар'), ('category', 'категория'), ('menu_item', 'пункт меню ресторана')], max_length=9, verbose_name='модель')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id удалённого объекта')),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='время удаления')),
+            ],
+            options={
+                'verbose_name': 'удалённый объект каталога',
+                'verbose_name_plural': 'удалённые объекты каталога',
+            },
+        ),
+        migrations.AddField(
+            model_name='banner',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='время изменения'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='время изменения'),
+        ),
+        migrations.AddField(
+            model_name='productcategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='время изменения'),
+        ),
+        migrations.AddField(
+            model_name='restaurantmenuitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='время изменения'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0048_catalog_change_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'id'], name='foodcartapp_categor_f6c6ed_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:35
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0049_product_category_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.PositiveIntegerField(verbose_name='id заказа')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='время события')),
+            ],
+            options={
+                'verbose_name': 'событие заказа',
+                'verbose_name_plural': 'события заказов',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0050_orderevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='restaurant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='foodcartapp.Restaurant', verbose_name='ресторан'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='capacity',
+            field=models.PositiveIntegerField(default=20, help_text='сколько необработанных заказов ресторан берёт одновременно', verbose_name='вместимость'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0051_order_restaurant'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['payment_method', 'registrated_at'], name='foodcartapp_payment_d4fcc1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['registrated_at', 'id'], name='foodcartapp_registr_768ac3_idx'),
+        ),
+    ]
@@ -1,8 +1,12 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db.models import Sum
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
 from django.utils import timezone
-from django.utils.functional import cached_property
+
+from .images import get_image_url, get_image_urls
 
 
 class Restaurant(models.Model):
@@ -10,6 +14,9 @@ class Restaurant(models.Model):
     address = models.CharField('адрес', max_length=100, blank=True)
     contact_phone = models.CharField(
         'контактный телефон', max_length=50, blank=True)
+    capacity = models.PositiveIntegerField(
+        'вместимость', default=20,
+        help_text='сколько необработанных заказов ресторан берёт одновременно')
 
     def __str__(self):
         return self.name
@@ -19,13 +26,34 @@ class Restaurant(models.Model):
         verbose_name_plural = 'рестораны'
 
 
+menu_items_bulk_changed = Signal()
+
+
 class ProductQuerySet(models.QuerySet):
     def available(self):
-        return self.distinct().filter(menu_items__availability=True)
+        return self.filter(available_restaurants_count__gt=0)
+
+    def deliverable_from(self, restaurant_ids):
+        return self.filter(pk__in=RestaurantMenuItem.objects.filter(
+            restaurant_id__in=restaurant_ids, availability=True,
+        ).values('product_id'))
+
+    def update_availability_counts(self):
+        available_menu_items = RestaurantMenuItem.objects.filter(
+            product=OuterRef('pk'), availability=True).values(
+            'product').annotate(count=Count('pk')).values('count')
+        count = Coalesce(Subquery(available_menu_items), Value(0))
+        changed_products = self.annotate(new_count=count).exclude(
+            available_restaurants_count=F('new_count'))
+        return Product.objects.filter(
+            pk__in=changed_products.values('pk')).update(
+            available_restaurants_count=count, updated_at=timezone.now())
 
 
 class ProductCategory(models.Model):
     name = models.CharField('название', max_length=50)
+    updated_at = models.DateTimeField(
+        'время изменения', auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = 'категория'
@@ -45,15 +73,81 @@ class Product(models.Model):
     special_status = models.BooleanField(
         'спец.предложение', default=False, db_index=True)
     ingridients = models.CharField('ингредиенты', max_length=200, blank=True)
+    available_restaurants_count = models.PositiveIntegerField(
+        'ресторанов с товаром в продаже', default=0, db_index=True,
+        editable=False)
+    image_hash = models.CharField(
+        'хэш картинки', max_length=16, blank=True, editable=False)
+    updated_at = models.DateTimeField(
+        'время изменения', auto_now=True, db_index=True)
 
     objects = ProductQuerySet.as_manager()
 
+    # эти поля обновляются отдельными запросами, иначе
+    # устаревшее значение из памяти затрёт актуальное в базе
+    denormalized_fields = ['available_restaurants_count', 'image_hash']
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and
+                field.name not in self.denormalized_fields
+            ]
+        return super().save(*args, **kwargs)
+
+    def get_image_url(self, width=None, image_format='jpeg'):
+        return get_image_url(
+            self.image, self.image_hash,
+            width or settings.PRODUCT_IMAGE_DEFAULT_WIDTH, image_format)
+
+    def get_image_urls(self):
+        return get_image_urls(self.image_hash, settings.PRODUCT_IMAGE_WIDTHS)
+
+    @property
+    def thumbnail_url(self):
+        return self.get_image_url(settings.PRODUCT_IMAGE_THUMBNAIL_WIDTH)
+
     class Meta:
         verbose_name = 'товар'
         verbose_name_plural = 'товары'
+        indexes = [
+            models.Index(fields=['category', 'id']),
+        ]
+
+
+class RestaurantMenuItemQuerySet(models.QuerySet):
+    def _menu_items_changed(self, product_ids):
+        Product.objects.filter(pk__in=product_ids).update_availability_counts()
+        menu_items_bulk_changed.send(sender=self.model)
+
+    def update(self, **kwargs):
+        kwargs.setdefault('updated_at', timezone.now())
+        product_ids = set(self.values_list('product_id', flat=True))
+        with transaction.atomic():
+            rows = super().update(**kwargs)
+            product_ids |= set(self.values_list('product_id', flat=True))
+            self._menu_items_changed(product_ids)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic():
+            objs = super().bulk_create(objs, *args, **kwargs)
+            self._menu_items_changed({obj.product_id for obj in objs})
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        updated_at = timezone.now()
+        for obj in objs:
+            obj.updated_at = updated_at
+        fields = [*fields, 'updated_at']
+        with transaction.atomic():
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            self._menu_items_changed({obj.product_id for obj in objs})
+        return rows
 
 
 class RestaurantMenuItem(models.Model):
@@ -63,6 +157,10 @@ class RestaurantMenuItem(models.Model):
         Product, on_delete=models.CASCADE, related_name='menu_items')
     availability = models.BooleanField(
         'в продаже', default=True, db_index=True)
+    updated_at = models.DateTimeField(
+        'время изменения', auto_now=True, db_index=True)
+
+    objects = RestaurantMenuItemQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.restaurant.name} - {self.product.name}"
@@ -75,11 +173,39 @@ class RestaurantMenuItem(models.Model):
         ]
 
 
+class OrderQuerySet(models.QuerySet):
+    def actionable(self):
+        return self.filter(status__in=Order.ACTIONABLE_STATUSES)
+
+    def with_totals(self):
+        return self.annotate(calculated_total=Coalesce(
+            Sum('order_items__product_total'), Value(0),
+            output_field=models.DecimalField()))
+
+    def update_totals(self):
+        items_total = OrderProductItem.objects.filter(
+            order=OuterRef('pk')).values('order').annotate(
+            total=Sum('product_total')).values('total')
+        return self.update(total=Coalesce(
+            Subquery(items_total), Value(0),
+            output_field=models.DecimalField()))
+
+    def unassigned(self):
+        return self.actionable().filter(restaurant__isnull=True)
+
+    def seek(self, registrated_at, order_id):
+        return self.filter(
+            Q(registrated_at__gt=registrated_at) |
+            Q(registrated_at=registrated_at, id__gt=order_id)
+        )
+
+
 class Order(models.Model):
     STATUS = [
         ('NO', 'Необработанный'),
         ('YES', 'Обработанный'),
     ]
+    ACTIONABLE_STATUSES = ['NO']
 
     PAYMENT_METHOD = [
         ('Cash', 'Наличными'),
@@ -103,18 +229,26 @@ class Order(models.Model):
     payment_method = models.CharField(
         max_length=4, choices=PAYMENT_METHOD,
         default='Неизвестно', verbose_name='способ оплаты')
+    total = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0,
+        verbose_name='стоимость заказа')
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='orders', verbose_name='ресторан')
+
+    objects = OrderQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.lastname}: {self.address}"
 
-    @cached_property
-    def cart_total(self):
-        return self.order_items.all().aggregate(
-            cart_total=Sum('product_total'))
-
     class Meta:
         verbose_name = "заказ на доставку"
         verbose_name_plural = "заказы на доставку"
+        indexes = [
+            models.Index(fields=['status', 'registrated_at']),
+            models.Index(fields=['payment_method', 'registrated_at']),
+            models.Index(fields=['registrated_at', 'id']),
+        ]
 
 
 class OrderProductItem(models.Model):
@@ -134,8 +268,89 @@ class OrderProductItem(models.Model):
 
     def save(self, *args, **kwargs):
         self.product_total = self.product.price * self.quantity
-        return super().save(*args, **kwargs)
+        with transaction.atomic():
+            result = super().save(*args, **kwargs)
+            Order.objects.filter(pk=self.order_id).update_totals()
+        return result
 
     class Meta:
         verbose_name = "товар в заказе"
         verbose_name_plural = "товары в заказе"
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField('ключ', max_length=255, unique=True)
+    fingerprint = models.CharField('отпечаток запроса', max_length=64)
+    response_status = models.PositiveSmallIntegerField(
+        'код ответа', null=True, blank=True)
+    response_body = models.TextField('тело ответа', blank=True)
+    created_at = models.DateTimeField(
+        'время создания', default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.key
+
+    class Meta:
+        verbose_name = 'ключ идемпотентности'
+        verbose_name_plural = 'ключи идемпотентности'
+
+
+class OrderEvent(models.Model):
+    order_id = models.PositiveIntegerField('id заказа')
+    created_at = models.DateTimeField(
+        'время события', default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f'{self.order_id} {self.created_at}'
+
+    class Meta:
+        verbose_name = 'событие заказа'
+        verbose_name_plural = 'события заказов'
+
+
+class Banner(models.Model):
+    title = models.CharField('заголовок', max_length=100)
+    image = models.ImageField('картинка', upload_to='banners')
+    image_hash = models.CharField(
+        'хэш картинки', max_length=16, blank=True, editable=False)
+    text = models.CharField('текст', max_length=200, blank=True)
+    position = models.PositiveIntegerField(
+        'позиция', default=0, db_index=True)
+    is_active = models.BooleanField('показывать', default=True)
+    updated_at = models.DateTimeField('время изменения', auto_now=True)
+
+    def __str__(self):
+        return self.title
+
+    def get_image_url(self, width=None, image_format='jpeg'):
+        return get_image_url(
+            self.image, self.image_hash,
+            width or settings.BANNER_IMAGE_DEFAULT_WIDTH, image_format)
+
+    def get_image_urls(self):
+        return get_image_urls(self.image_hash, settings.BANNER_IMAGE_WIDTHS)
+
+    class Meta:
+        verbose_name = 'баннер'
+        verbose_name_plural = 'баннеры'
+        ordering = ['position', 'id']
+
+
+class CatalogTombstone(models.Model):
+    MODELS = [
+        ('product', 'товар'),
+        ('category', 'категория'),
+        ('menu_item', 'пункт меню ресторана'),
+    ]
+
+    model = models.CharField('модель', max_length=9, choices=MODELS)
+    object_id = models.PositiveIntegerField('id удалённого объекта')
+    deleted_at = models.DateTimeField(
+        'время удаления', default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}'
+
+    class Meta:
+        verbose_name = 'удалённый объект каталога'
+        verbose_name_plural = 'удалённые объекты каталога'
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OrderEvent
+
+
+def publish_order_events(order_ids):
+    # Событие пишется после коммита, чтобы дашборд не увидел заказ
+    # раньше, чем его можно прочитать из базы.
+    events = [OrderEvent(order_id=order_id) for order_id in order_ids]
+    transaction.on_commit(lambda: OrderEvent.objects.bulk_create(events))
+
+
+def get_last_event_id():
+    return OrderEvent.objects.order_by('-id').values_list(
+        'id', flat=True).first() or 0
+
+
+def get_events_after(event_id):
+    return list(OrderEvent.objects.filter(id__gt=event_id).order_by(
+        'id').values_list('id', 'order_id'))
+
+
+def get_expiration_time():
+    return timezone.now() - timedelta(seconds=settings.ORDER_EVENTS_TTL)
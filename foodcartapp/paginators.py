@@ -0,0 +1,38 @@
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+
+class CappedCountPaginator(Paginator):
+    # Точный COUNT(*) по большой таблице читает её целиком. Считаем строки
+    # только до max_count: дальше этой границы страницы не открываются,
+    # поэтому и OFFSET не растёт бесконечно.
+    def __init__(self, object_list, per_page, max_count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.max_count = max_count
+
+    @cached_property
+    def count(self):
+        return self.object_list.order_by().values(
+            'pk')[:self.max_count].count()
+
+    @property
+    def is_capped(self):
+        return self.count >= self.max_count
+
+    @property
+    def display_count(self):
+        # Упёршийся в границу счётчик — это только нижняя оценка
+        if self.is_capped:
+            return f'{self.count}+'
+        return str(self.count)
+
+    def page(self, number):
+        # Отложенное соединение: OFFSET проходит только по узкому индексу
+        # с первичными ключами, а полные строки читаются для одной страницы.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        page_ids = list(
+            self.object_list.values_list('pk', flat=True)[bottom:top])
+        return self._get_page(
+            self.object_list.filter(pk__in=page_ids), number, self)
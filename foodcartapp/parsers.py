@@ -0,0 +1,24 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        reader = codecs.getreader(encoding)(stream)
+
+        items = []
+        for line in reader:
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)
+        return items
@@ -0,0 +1,138 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+from .catalog import serialize_product
+from .models import Product
+from .versioned_index import VersionedIndex
+
+
+FIELD_WEIGHTS = {
+    'name': 3,
+    'category': 2,
+    'ingridients': 1,
+}
+PREFIX_MATCH_FACTOR = 0.5
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize_text(text):
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return text.replace('ё', 'е')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize_text(text))
+
+
+def get_product_fields(product):
+    return {
+        'name': product.name,
+        'category': product.category.name if product.category else '',
+        'ingridients': product.ingridients,
+    }
+
+
+class InvertedIndex:
+    def __init__(self):
+        self.postings = {}
+        self.tokens = []
+        self.documents = {}
+
+    def add(self, document_id, fields, document):
+        self.remove(document_id)
+        weights = {}
+        for field, text in fields.items():
+            for token in tokenize(text):
+                weights[token] = max(weights.get(token, 0), FIELD_WEIGHTS[field])
+
+        for token, weight in weights.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                insort(self.tokens, token)
+            self.postings[token][document_id] = weight
+        self.documents[document_id] = (set(weights), document)
+
+    def remove(self, document_id):
+        tokens, _ = self.documents.pop(document_id, (set(), None))
+        for token in tokens:
+            postings = self.postings[token]
+            postings.pop(document_id, None)
+            if not postings:
+                del self.postings[token]
+                del self.tokens[bisect_left(self.tokens, token)]
+
+    def match_term(self, term):
+        scores = {}
+        start = bisect_left(self.tokens, term)
+        for position in range(start, len(self.tokens)):
+            token = self.tokens[position]
+            if not token.startswith(term):
+                break
+            factor = 1 if token == term else PREFIX_MATCH_FACTOR
+            for document_id, weight in self.postings[token].items():
+                score = weight * factor
+                if scores.get(document_id, 0) < score:
+                    scores[document_id] = score
+        return scores
+
+    def search(self, query, limit=20):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores = None
+        for term in sorted(set(terms), key=len, reverse=True):
+            term_scores = self.match_term(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    document_id: score + term_scores[document_id]
+                    for document_id, score in scores.items()
+                    if document_id in term_scores
+                }
+            if not scores:
+                return []
+
+        ranked = heapq.nsmallest(
+            limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [self.documents[document_id][1] for document_id, _ in ranked]
+
+
+class ProductSearchIndex(VersionedIndex):
+    version_key = 'product-search-index-version'
+
+    def build(self):
+        index = InvertedIndex()
+        products = Product.objects.select_related('category').available()
+        for product in products:
+            index.add(
+                product.id, get_product_fields(product),
+                serialize_product(product))
+        return index
+
+    def search(self, query, limit=20):
+        return self.get_data().search(query, limit)
+
+    def update_products(self, product_ids):
+        products = Product.objects.select_related('category').filter(
+            pk__in=product_ids)
+        documents = {
+            product.id: (get_product_fields(product), serialize_product(product))
+            for product in products
+            if product.available_restaurants_count
+        }
+
+        def change(index):
+            for product_id in product_ids:
+                if product_id in documents:
+                    index.add(product_id, *documents[product_id])
+                else:
+                    index.remove(product_id)
+        self.apply(change)
+
+
+search_index = ProductSearchIndex()
@@ -0,0 +1,220 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from places.geocoder import get_places_coords
+from places.models import normalize_address
+from .banners import bump_banners_version
+from .catalog import bump_catalog_version
+from .delivery import restaurant_locations
+from .images import IMAGE_ERRORS, make_derivatives
+from .menu_index import menu_index
+from .search import search_index
+from .models import Restaurant, Order, OrderProductItem, RestaurantMenuItem
+from .models import Banner, Product, ProductCategory, menu_items_bulk_changed
+from .models import CatalogTombstone
+
+
+@receiver(pre_save, sender=Restaurant)
+def remember_restaurant_address(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._previous_address = None
+        return
+    instance._previous_address = Restaurant.objects.filter(
+        pk=instance.pk).values_list('address', flat=True).first()
+
+
+@receiver(post_save, sender=Restaurant)
+def update_restaurant_location(sender, instance, created, **kwargs):
+    previous_address = getattr(instance, '_previous_address', None)
+    if not created and previous_address == instance.address:
+        return
+    restaurant_id = instance.pk
+    address = instance.address
+
+    def update():
+        # Геокодер здесь не вызываем, чтобы не держать запрос: новые адреса
+        # дозаполняет по крону команда geocode_addresses.
+        coords = get_places_coords([address]).get(normalize_address(address))
+        restaurant_locations.update(restaurant_id, coords)
+        bump_catalog_version()
+    transaction.on_commit(update)
+
+
+@receiver(post_delete, sender=Restaurant)
+def remove_restaurant_location(sender, instance, **kwargs):
+    restaurant_id = instance.pk
+
+    def remove():
+        restaurant_locations.update(restaurant_id, None)
+        bump_catalog_version()
+    transaction.on_commit(remove)
+
+
+@receiver(pre_save, sender=RestaurantMenuItem)
+def remember_menu_item_pair(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._previous_pair = None
+        return
+    instance._previous_pair = RestaurantMenuItem.objects.filter(
+        pk=instance.pk).values_list('restaurant_id', 'product_id').first()
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+def update_menu_index(sender, instance, **kwargs):
+    previous_pair = getattr(instance, '_previous_pair', None)
+    pair = (instance.restaurant_id, instance.product_id)
+    availability = instance.availability
+
+    def update():
+        if previous_pair and previous_pair != pair:
+            menu_index.update(*previous_pair, available=False)
+        menu_index.update(*pair, available=availability)
+    transaction.on_commit(update)
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def update_product_availability(sender, instance, **kwargs):
+    product_ids = {instance.product_id}
+    previous_pair = getattr(instance, '_previous_pair', None)
+    if previous_pair:
+        product_ids.add(previous_pair[1])
+    Product.objects.filter(pk__in=product_ids).update_availability_counts()
+
+
+@receiver(menu_items_bulk_changed)
+def invalidate_menu_caches(sender, **kwargs):
+    transaction.on_commit(menu_index.invalidate)
+    transaction.on_commit(search_index.invalidate)
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_delete, sender=RestaurantMenuItem)
+def remove_from_menu_index(sender, instance, **kwargs):
+    pair = (instance.restaurant_id, instance.product_id)
+    transaction.on_commit(
+        lambda: menu_index.update(*pair, available=False))
+
+
+@receiver(post_delete, sender=OrderProductItem)
+def update_order_total(sender, instance, **kwargs):
+    Order.objects.filter(pk=instance.order_id).update_totals()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def invalidate_catalog(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Banner)
+def remember_image_name(sender, instance, raw, **kwargs):
+    if raw or instance.pk is None:
+        instance._previous_image = None
+        return
+    instance._previous_image = sender.objects.filter(
+        pk=instance.pk).values_list('image', flat=True).first()
+
+
+def make_image_derivatives(instance, widths, bump_version):
+    image_name = instance.image.name
+    if not image_name:
+        return
+    if image_name == getattr(instance, '_previous_image', None):
+        return
+    model = type(instance)
+    pk = instance.pk
+
+    def make():
+        try:
+            image_hash = make_derivatives(image_name, widths)
+        except IMAGE_ERRORS:
+            # Без хэша отдаётся оригинал; нарезку можно повторить командой
+            # build_image_derivatives.
+            image_hash = ''
+        updated = model.objects.filter(pk=pk).exclude(
+            image_hash=image_hash).update(
+            image_hash=image_hash, updated_at=timezone.now())
+        if updated:
+            bump_version()
+    transaction.on_commit(make)
+
+
+@receiver(post_save, sender=Product)
+def make_product_image_derivatives(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    product_id = instance.pk
+
+    def on_image_hash_change():
+        search_index.update_products([product_id])
+        bump_catalog_version()
+    make_image_derivatives(
+        instance, settings.PRODUCT_IMAGE_WIDTHS, on_image_hash_change)
+
+
+@receiver(post_save, sender=Banner)
+def make_banner_image_derivatives(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    make_image_derivatives(
+        instance, settings.BANNER_IMAGE_WIDTHS, bump_banners_version)
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def invalidate_banners(sender, **kwargs):
+    transaction.on_commit(bump_banners_version)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def add_catalog_tombstone(sender, instance, **kwargs):
+    tombstone_models = {
+        Product: 'product',
+        ProductCategory: 'category',
+        RestaurantMenuItem: 'menu_item',
+    }
+    CatalogTombstone.objects.create(
+        model=tombstone_models[sender], object_id=instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def update_search_index(sender, instance, **kwargs):
+    product_ids = [instance.pk]
+    transaction.on_commit(lambda: search_index.update_products(product_ids))
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def update_search_index_availability(sender, instance, **kwargs):
+    product_ids = {instance.product_id}
+    previous_pair = getattr(instance, '_previous_pair', None)
+    if previous_pair:
+        product_ids.add(previous_pair[1])
+    transaction.on_commit(lambda: search_index.update_products(product_ids))
+
+
+@receiver(post_save, sender=ProductCategory)
+def update_search_index_category(sender, instance, **kwargs):
+    category_id = instance.pk
+
+    def update():
+        search_index.update_products(list(Product.objects.filter(
+            category_id=category_id).values_list('id', flat=True)))
+    transaction.on_commit(update)
+
+
+@receiver(post_delete, sender=ProductCategory)
+def invalidate_search_index(sender, instance, **kwargs):
+    transaction.on_commit(search_index.invalidate)
@@ -0,0 +1,98 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .encoders import encode_all
+
+
+SNAPSHOT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class Snapshot:
+    def __init__(self, version, modified_at, bodies):
+        self.version = version
+        self.modified_at = modified_at
+        self.bodies = bodies
+
+
+# Версия сверяется с общим кэшем не чаще раза в
+# INDEX_VERSION_CHECK_INTERVAL секунд, как и у VersionedIndex: так ответ
+# 304 на If-None-Match обходится без запросов к базе.
+_versions = {}
+
+
+def get_versions_cache():
+    return caches[settings.VERSIONS_CACHE_ALIAS]
+
+
+def get_snapshots_cache():
+    return caches[settings.SNAPSHOTS_CACHE_ALIAS]
+
+
+def get_snapshot_key(name, version):
+    return f'snapshot:{name}:{version}'
+
+
+def remember_version(name, version):
+    _versions[name] = (version, time.monotonic())
+    return version
+
+
+def bump_version(name):
+    version = {
+        'version': uuid.uuid4().hex,
+        'modified_at': timezone.now().replace(microsecond=0),
+    }
+    versions_cache = get_versions_cache()
+    previous_version = versions_cache.get(f'{name}-version')
+    versions_cache.set(f'{name}-version', version, None)
+    if previous_version:
+        # Снимок прошлой версии больше никто не запросит
+        get_snapshots_cache().delete(
+            get_snapshot_key(name, previous_version['version']))
+    return remember_version(name, version)
+
+
+def get_version(name):
+    remembered = _versions.get(name)
+    if remembered:
+        version, checked_at = remembered
+        if (time.monotonic() - checked_at <
+                settings.INDEX_VERSION_CHECK_INTERVAL):
+            return version
+    version = get_versions_cache().get(f'{name}-version')
+    if version is None:
+        return bump_version(name)
+    return remember_version(name, version)
+
+
+def make_snapshot(version, build_data):
+    return Snapshot(
+        version['version'], version['modified_at'], encode_all(build_data()))
+
+
+def build_snapshot(name, version, build_data):
+    snapshot = make_snapshot(version, build_data)
+    get_snapshots_cache().set(
+        get_snapshot_key(name, snapshot.version), snapshot,
+        SNAPSHOT_CACHE_TIMEOUT)
+    return snapshot
+
+
+_snapshots = {}
+
+
+def get_snapshot(name, version, build_data):
+    snapshot = _snapshots.get(name)
+    if snapshot and snapshot.version == version['version']:
+        return snapshot
+
+    snapshot = get_snapshots_cache().get(
+        get_snapshot_key(name, version['version']))
+    if snapshot is None:
+        snapshot = build_snapshot(name, version, build_data)
+    _snapshots[name] = snapshot
+    return snapshot
@@ -0,0 +1,480 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import urlsafe_base64_encode
+
+from .models import Banner, IdempotencyKey, Order, OrderProductItem, Product
+from .models import ProductCategory, Restaurant, RestaurantMenuItem
+from .catalog import build_catalog_snapshot, bump_catalog_version
+from .catalog import get_catalog_version, get_delivery_catalog_snapshot
+from .changes import encode_cursor, encode_page_cursor
+from .search import search_index
+from .snapshots import get_snapshot_key, get_snapshots_cache
+from . import views
+
+
+def make_order_data(products, **fields):
+    return {
+        'products': [
+            {'product': product.id, 'quantity': 2} for product in products
+        ],
+        'firstname': 'Иван',
+        'lastname': 'Петров',
+        'phonenumber': '+79291000000',
+        'address': 'Москва, Новый Арбат, 10',
+        **fields,
+    }
+
+
+class RegisterOrderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [
+            Product.objects.create(
+                name=f'Бургер {number}', price=100 + number,
+                image=f'burger-{number}.jpg')
+            for number in range(10)
+        ]
+
+    def post_order(self, products):
+        return self.client.post(
+            '/api/order/', make_order_data(products),
+            content_type='application/json')
+
+    def test_query_count_does_not_depend_on_cart_size(self):
+        with CaptureQueriesContext(connection) as single_line_queries:
+            response = self.post_order(self.products[:1])
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(len(single_line_queries)):
+            response = self.post_order(self.products)
+        self.assertEqual(response.status_code, 200)
+
+        order = Order.objects.latest('id')
+        self.assertEqual(order.order_items.count(), 10)
+        self.assertEqual(order.total, sum(
+            product.price * 2 for product in self.products))
+
+
+class IdempotentRegisterOrderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.burger = Product.objects.create(
+            name='Бургер', price=100, image='burger.jpg')
+
+    def post_order(self, order_data, key='order-1'):
+        return self.client.post(
+            '/api/order/', order_data, content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay_returns_stored_response(self):
+        order_data = make_order_data([self.burger])
+        first_response = self.post_order(order_data)
+        self.assertEqual(first_response.status_code, 200)
+
+        replayed_response = self.post_order(order_data)
+        self.assertEqual(replayed_response.status_code, 200)
+        self.assertEqual(replayed_response.json(), first_response.json())
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(OrderProductItem.objects.count(), 1)
+
+    def test_key_reused_with_another_body(self):
+        self.post_order(make_order_data([self.burger]))
+        response = self.post_order(
+            make_order_data([self.burger], firstname='Пётр'))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_expired_key_is_reused(self):
+        self.post_order(make_order_data([self.burger]))
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_TTL + 1))
+
+        response = self.post_order(
+            make_order_data([self.burger], firstname='Пётр'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(Order.objects.values_list('firstname', flat=True)),
+            ['Иван', 'Пётр'])
+
+    def test_failed_request_does_not_keep_key(self):
+        response = self.post_order(make_order_data([self.burger], firstname=''))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self.post_order(make_order_data([self.burger]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class RegisterOrdersBatchTest(TestCase):
+    batch_url = '/api/order/batch/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.burger = Product.objects.create(
+            name='Бургер', price=100, image='burger.jpg')
+        cls.fries = Product.objects.create(
+            name='Картошка', price=50, image='fries.jpg')
+
+    def get_statuses(self, response):
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual(
+            [result['index'] for result in results], list(range(len(results))))
+        return [result['status'] for result in results]
+
+    def test_mixed_json_entries(self):
+        orders = [
+            make_order_data([self.burger]),
+            make_order_data([self.burger], firstname=''),
+            'не заказ',
+            {**make_order_data([self.fries]), 'products': [
+                {'product': 9999, 'quantity': 1}]},
+            make_order_data([self.burger, self.fries]),
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.batch_url, orders, content_type='application/json')
+
+        self.assertEqual(self.get_statuses(response), [
+            'created', 'error', 'error', 'error', 'created'])
+        results = response.json()
+        self.assertIn('firstname', results[1]['errors'])
+        self.assertIn('products', results[3]['errors'])
+        self.assertEqual(
+            set(Order.objects.values_list('id', flat=True)),
+            {results[0]['id'], results[4]['id']})
+        product_queries = [
+            query for query in queries
+            if 'FROM "foodcartapp_product"' in query['sql']
+        ]
+        self.assertEqual(len(product_queries), 1)
+
+    def test_ndjson_entries(self):
+        lines = [
+            json.dumps(make_order_data([self.burger])),
+            '{битый json',
+            '',
+            json.dumps(make_order_data([self.fries])),
+        ]
+        response = self.client.post(
+            self.batch_url, '\n'.join(lines),
+            content_type='application/x-ndjson')
+
+        self.assertEqual(
+            self.get_statuses(response), ['created', 'error', 'created'])
+        self.assertEqual(Order.objects.count(), 2)
+
+    @override_settings(ORDERS_BATCH_CHUNK_SIZE=1)
+    def test_failed_chunk_keeps_other_chunks(self):
+        create_orders = views.create_orders
+        calls = []
+
+        def fail_second_chunk(orders_data, products):
+            calls.append(orders_data)
+            orders = create_orders(orders_data, products)
+            if len(calls) == 2:
+                raise DatabaseError('диск переполнен')
+            return orders
+
+        orders = [
+            make_order_data([self.burger], firstname=f'Клиент {number}')
+            for number in range(3)
+        ]
+        with mock.patch.object(
+                views, 'create_orders', side_effect=fail_second_chunk):
+            response = self.client.post(
+                self.batch_url, orders, content_type='application/json')
+
+        self.assertEqual(
+            self.get_statuses(response), ['created', 'error', 'created'])
+        self.assertEqual(
+            sorted(Order.objects.values_list('firstname', flat=True)),
+            ['Клиент 0', 'Клиент 2'])
+
+
+class CatalogConditionalRequestTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.create(name='Бургер', price=100, image='burger.jpg')
+        Banner.objects.create(title='Бургер', image='banners/burger.jpg')
+
+    def test_not_modified_skips_database(self):
+        for url in ['/api/products/', '/api/banners/']:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            with self.assertNumQueries(0):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+
+class CatalogSnapshotTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.create(name='Бургер', price=100, image='burger.jpg')
+
+    def count_shared_snapshots(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM snapshots_cache_table')
+            return cursor.fetchone()[0]
+
+    def test_bump_deletes_previous_snapshot(self):
+        snapshot = build_catalog_snapshot(bump_catalog_version())
+        snapshot_key = get_snapshot_key('catalog', snapshot.version)
+        self.assertIsNotNone(get_snapshots_cache().get(snapshot_key))
+
+        bump_catalog_version()
+        self.assertIsNone(get_snapshots_cache().get(snapshot_key))
+
+    def test_delivery_snapshots_stay_in_process(self):
+        catalog_version = get_catalog_version()
+        shared_snapshots = self.count_shared_snapshots()
+        snapshots = [
+            get_delivery_catalog_snapshot(catalog_version, [restaurant_id])
+            for restaurant_id in range(100)
+        ]
+        self.assertEqual(self.count_shared_snapshots(), shared_snapshots)
+        self.assertIs(
+            get_delivery_catalog_snapshot(catalog_version, [99]),
+            snapshots[-1])
+
+        new_version = bump_catalog_version()
+        self.assertEqual(
+            get_delivery_catalog_snapshot(new_version, [99]).version,
+            new_version['version'])
+
+
+class CatalogChangesTest(TestCase):
+    changes_url = '/api/products/changes/'
+
+    @classmethod
+    def setUpTestData(cls):
+        restaurant = Restaurant.objects.create(name='Стар Бургер')
+        categories = [
+            ProductCategory.objects.create(name=name)
+            for name in ['Бургеры', 'Напитки']
+        ]
+        for number in range(4):
+            product = Product.objects.create(
+                name=f'Бургер {number}', price=100, image='burger.jpg',
+                category=categories[number % 2])
+            RestaurantMenuItem.objects.create(
+                restaurant=restaurant, product=product)
+
+    def get_changes(self, **params):
+        response = self.client.get(self.changes_url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def walk_full_sync(self, **params):
+        pages = [self.get_changes(**params)]
+        while pages[-1]['next_page']:
+            pages.append(self.get_changes(page=pages[-1]['next_page']))
+        return pages
+
+    @override_settings(CATALOG_CHANGES_PAGE_SIZE=3)
+    def test_full_sync_is_paged(self):
+        pages = self.walk_full_sync()
+
+        self.assertEqual(len(pages), 4)
+        for page in pages:
+            self.assertTrue(page['full'])
+            self.assertLessEqual(sum(
+                len(page[section]['changed'])
+                for section in ['categories', 'products', 'menu_items']
+            ), 3)
+        self.assertEqual(
+            [page['cursor'] is not None for page in pages],
+            [False, False, False, True])
+
+        for section, model in [
+            ('categories', ProductCategory),
+            ('products', Product),
+            ('menu_items', RestaurantMenuItem),
+        ]:
+            ids = [
+                row['id'] for page in pages
+                for row in page[section]['changed']
+            ]
+            self.assertEqual(
+                ids, list(model.objects.order_by('id').values_list(
+                    'id', flat=True)))
+
+        changes = self.get_changes(since=pages[-1]['cursor'])
+        self.assertFalse(changes['full'])
+        self.assertIsNone(changes['next_page'])
+
+    @override_settings(CATALOG_CHANGES_PAGE_SIZE=3)
+    def test_expired_cursor_starts_full_sync(self):
+        expired_cursor = encode_cursor(timezone.now() - timedelta(
+            seconds=settings.CATALOG_TOMBSTONE_TTL + 1))
+        pages = self.walk_full_sync(since=expired_cursor)
+        self.assertTrue(all(page['full'] for page in pages))
+        self.assertIsNotNone(pages[-1]['cursor'])
+
+    def test_invalid_cursors(self):
+        for params in [
+            {'since': 'не base64'},
+            {'since': urlsafe_base64_encode(b'not a date')},
+            {'since': urlsafe_base64_encode(b'2026-01-01T00:00:00')},
+            {'page': urlsafe_base64_encode(b'2026-01-01T00:00:00')},
+            {'page': encode_page_cursor(timezone.now(), 'orders', 0)},
+        ]:
+            response = self.client.get(self.changes_url, params)
+            self.assertEqual(response.status_code, 400)
+
+
+class ProductSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        product = Product.objects.create(
+            name='Чизбургер', price=150, image='cheeseburger.jpg')
+        restaurant = Restaurant.objects.create(
+            name='Стар Бургер', address='Москва, Новый Арбат, 10')
+        RestaurantMenuItem.objects.create(
+            restaurant=restaurant, product=product)
+
+    def test_repeated_search_skips_database(self):
+        search_index.invalidate()
+        self.assertEqual(len(search_index.search('чиз', 10)), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(search_index.search('чизбургер', 10)), 1)
+
+
+class OrderAdminTest(TestCase):
+    changelist_url = '/admin/foodcartapp/order/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        start = timezone.make_aware(datetime(2025, 11, 20, 12))
+        Order.objects.bulk_create([
+            Order(
+                firstname='Иван', phonenumber='+79291000000',
+                address='Москва, Новый Арбат, 10',
+                registrated_at=start + timedelta(hours=number * 7))
+            for number in range(500)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get_changelist(self, **params):
+        response = self.client.get(self.changelist_url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_deep_pages_run_the_same_queries(self):
+        with CaptureQueriesContext(connection) as first_page_queries:
+            self.get_changelist()
+        for page in [2, 4]:
+            with self.assertNumQueries(len(first_page_queries)):
+                response = self.get_changelist(p=page)
+            self.assertEqual(len(response.context['cl'].result_list), 100)
+
+    def test_date_hierarchy_filters_run_the_same_queries(self):
+        with CaptureQueriesContext(connection) as month_queries:
+            self.get_changelist(
+                registrated_at__year=2025, registrated_at__month=12)
+        with self.assertNumQueries(len(month_queries)):
+            response = self.get_changelist(
+                registrated_at__year=2026, registrated_at__month=1)
+        self.assertEqual(len(response.context['cl'].result_list), 100)
+
+    def test_date_hierarchy_does_not_scan_distinct_dates(self):
+        for params in [
+            {},
+            {'registrated_at__year': 2026},
+            {'registrated_at__year': 2026, 'registrated_at__month': 1},
+        ]:
+            with CaptureQueriesContext(connection) as queries:
+                self.get_changelist(**params)
+            self.assertFalse(any(
+                'DISTINCT' in query['sql'] for query in queries))
+
+    def test_date_hierarchy_matches_queryset_dates(self):
+        cl = self.get_changelist(registrated_at__year=2026).context['cl']
+        orders = Order.objects.filter(registrated_at__year=2026)
+        for kind in ['year', 'month', 'day']:
+            self.assertEqual(
+                cl.queryset.dates('registrated_at', kind),
+                list(orders.dates('registrated_at', kind)))
+
+    @override_settings(ORDERS_ADMIN_MAX_COUNT=300)
+    def test_capped_count_is_shown_as_lower_bound(self):
+        response = self.get_changelist()
+        self.assertTrue(response.context['cl'].paginator.is_capped)
+        self.assertContains(response, '300+ заказ')
+        self.assertContains(response, 'Выбраны все 300+')
+
+        response = self.get_changelist(registrated_at__year=2025)
+        count = Order.objects.filter(registrated_at__year=2025).count()
+        self.assertFalse(response.context['cl'].paginator.is_capped)
+        self.assertContains(response, f'{count} заказ')
+        self.assertNotContains(response, f'{count}+')
+
+
+@skipUnless(
+    os.environ.get('ORDER_ADMIN_BENCHMARK'),
+    'замер списка заказов в админке: ORDER_ADMIN_BENCHMARK=1')
+class OrderAdminBenchmarkTest(TestCase):
+    # Заказы создаются в тестовой базе и откатываются вместе с тестом
+    changelist_url = '/admin/foodcartapp/order/'
+    orders_count = int(os.environ.get('ORDER_ADMIN_BENCHMARK_ORDERS', 200000))
+    max_seconds = 1
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        now = timezone.now()
+        batch_size = 10000
+        for start in range(0, cls.orders_count, batch_size):
+            Order.objects.bulk_create([
+                Order(
+                    firstname='Иван', phonenumber='+79291000000',
+                    address='Москва, Новый Арбат, 10',
+                    status=['NO', 'YES'][number % 2],
+                    payment_method=['Cash', 'Card'][number % 3 % 2],
+                    registrated_at=now - timedelta(minutes=number),
+                    total=100 + number % 5000)
+                for number in range(
+                    start, min(start + batch_size, cls.orders_count))
+            ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelist_pages(self):
+        now = timezone.localtime()
+        deepest_page = settings.ORDERS_ADMIN_MAX_COUNT // 100 - 1
+        for params in [
+            {},
+            {'p': deepest_page},
+            {'status__exact': 'NO', 'p': deepest_page},
+            {'payment_method__exact': 'Card'},
+            {'registrated_at__year': now.year},
+            {
+                'registrated_at__year': now.year,
+                'registrated_at__month': now.month,
+                'p': 10,
+            },
+        ]:
+            with self.subTest(**params):
+                started_at = time.monotonic()
+                response = self.client.get(self.changelist_url, params)
+                elapsed = time.monotonic() - started_at
+                self.assertEqual(response.status_code, 200)
+                self.assertLess(elapsed, self.max_seconds)
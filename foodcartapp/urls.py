@@ -1,12 +1,17 @@
 from django.urls import path
 
 from .views import product_list_api, banners_list_api, register_order
+from .views import register_orders_batch, product_changes_api
+from .views import product_search_api
 
 
 app_name = "foodcartapp"
 
 urlpatterns = [
     path('products/', product_list_api),
+    path('products/changes/', product_changes_api),
+    path('products/search/', product_search_api),
     path('banners/', banners_list_api),
     path('order/', register_order),
+    path('order/batch/', register_orders_batch),
 ]
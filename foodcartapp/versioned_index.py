@@ -0,0 +1,86 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class VersionedIndex:
+    # Каждый процесс держит свою копию индекса и правит её на месте.
+    # Счётчик версий в общем кэше подсказывает остальным процессам,
+    # что копию пора пересобрать. Сам счётчик сверяется не чаще раза
+    # в INDEX_VERSION_CHECK_INTERVAL секунд, чтобы чтение индекса обычно
+    # обходилось без запросов к кэшу в базе.
+    version_key = None
+
+    def __init__(self):
+        self._data = None
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def build(self):
+        raise NotImplementedError
+
+    @property
+    def cache(self):
+        return caches[settings.VERSIONS_CACHE_ALIAS]
+
+    def _shared_version(self):
+        cache = self.cache
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, 0, None)
+            version = cache.get(self.version_key)
+        return version
+
+    def _bump_shared_version(self):
+        cache = self.cache
+        cache.add(self.version_key, 0, None)
+        version = cache.incr(self.version_key)
+        # incr в части бэкендов перезаписывает ключ с таймаутом
+        # по умолчанию, а счётчик версий не должен протухать.
+        cache.touch(self.version_key, None)
+        return version
+
+    def rebuild(self):
+        checked_at = time.monotonic()
+        version = self._shared_version()
+        data = self.build()
+        with self._lock:
+            self._data = data
+            self._version = version
+            self._checked_at = checked_at
+        return data
+
+    def is_version_checked_recently(self):
+        checked_at = self._checked_at
+        return checked_at is not None and (
+            time.monotonic() - checked_at <
+            settings.INDEX_VERSION_CHECK_INTERVAL)
+
+    def get_data(self):
+        data = self._data
+        if data is not None and self.is_version_checked_recently():
+            return data
+        checked_at = time.monotonic()
+        if data is None or self._version != self._shared_version():
+            return self.rebuild()
+        self._checked_at = checked_at
+        return data
+
+    def apply(self, change):
+        version = self._bump_shared_version()
+        with self._lock:
+            if self._data is None:
+                return
+            if self._version != version - 1:
+                self._data = None
+                return
+            change(self._data)
+            self._version = version
+
+    def invalidate(self):
+        self._bump_shared_version()
+        with self._lock:
+            self._data = None
@@ -1,105 +1,343 @@
-from django.templatetags.static import static
-from django.http import JsonResponse
+import hashlib
+
+from django.http import HttpResponseBadRequest
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 import json
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, parser_classes
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from .models import Product, Order, OrderProductItem
 from rest_framework.serializers import ValidationError
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import IntegerField, ModelSerializer
 from rest_framework.renderers import JSONRenderer
-from django.db import transaction
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from places.geocoder import geocode
+from .banners import get_banners_snapshot, get_banners_version
+from .catalog import PRODUCT_FIELDS, get_catalog_page
+from .catalog import get_catalog_snapshot, get_catalog_version
+from .catalog import get_delivery_catalog_snapshot
+from .changes import decode_cursor, decode_page_cursor
+from .changes import get_catalog_changes, get_full_catalog_page
+from .delivery import get_delivering_restaurants
+from .encoders import encode, encoded_response
+from .encoders import get_representation, get_representation_tag
+from .idempotency import idempotent
+from .order_events import publish_order_events
+from .parsers import NDJSONParser
+from .search import search_index
+
+
+def get_request_banners_version(request):
+    if not hasattr(request, 'banners_version'):
+        request.banners_version = get_banners_version()
+    return request.banners_version
+
 
+def banners_etag(request):
+    version = get_request_banners_version(request)['version']
+    return f'{version}-{get_representation_tag(get_representation(request))}'
 
+
+def banners_last_modified(request):
+    return get_request_banners_version(request)['modified_at']
+
+
+@condition(etag_func=banners_etag, last_modified_func=banners_last_modified)
 def banners_list_api(request):
-    # FIXME move data to db?
-    return JsonResponse([
-        {
-            'title': 'Burger',
-            'src': static('burger.jpg'),
-            'text': 'Tasty Burger at your door step',
-        },
-        {
-            'title': 'Spices',
-            'src': static('food.jpg'),
-            'text': 'All Cuisines',
-        },
-        {
-            'title': 'New York',
-            'src': static('tasty.jpg'),
-            'text': 'Food is incomplete without a tasty dessert',
-        }
-    ], safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    snapshot = get_banners_snapshot(get_request_banners_version(request))
+    representation = get_representation(request)
+    response = encoded_response(
+        representation, snapshot.bodies[representation])
+    patch_cache_control(
+        response, public=True, max_age=settings.BANNERS_CACHE_MAX_AGE)
+    return response
+
+
+def get_request_catalog_version(request):
+    if not hasattr(request, 'catalog_version'):
+        request.catalog_version = get_catalog_version()
+    return request.catalog_version
+
+
+CATALOG_PAGE_PARAMS = ['limit', 'cursor', 'fields', 'category']
+CATALOG_LOCATION_PARAMS = ['lat', 'lon', 'address']
+
+
+def catalog_etag(request):
+    version = get_request_catalog_version(request)['version']
+    etag = f'{version}-{get_representation_tag(get_representation(request))}'
+    page_params = [
+        f'{param}={request.GET[param]}'
+        for param in CATALOG_PAGE_PARAMS + CATALOG_LOCATION_PARAMS
+        if param in request.GET
+    ]
+    if page_params:
+        query_hash = hashlib.md5('&'.join(page_params).encode()).hexdigest()
+        etag = f'{etag}-{query_hash}'
+    return etag
+
 
+def catalog_last_modified(request):
+    return get_request_catalog_version(request)['modified_at']
 
+
+def parse_catalog_page_params(request):
+    fields = list(PRODUCT_FIELDS)
+    if request.GET.get('fields'):
+        fields = request.GET['fields'].split(',')
+        unknown_fields = set(fields) - PRODUCT_FIELDS.keys()
+        if unknown_fields:
+            raise ValueError(
+                f'Unknown fields: {", ".join(sorted(unknown_fields))}')
+
+    after_id = None
+    if request.GET.get('cursor'):
+        after_id = int(urlsafe_base64_decode(request.GET['cursor']).decode())
+
+    category_id = None
+    if request.GET.get('category'):
+        category_id = int(request.GET['category'])
+
+    limit = int(request.GET.get('limit', settings.PRODUCTS_PAGE_SIZE))
+    limit = max(1, min(limit, settings.PRODUCTS_MAX_PAGE_SIZE))
+    return {
+        'fields': fields,
+        'after_id': after_id,
+        'category_id': category_id,
+        'limit': limit,
+    }
+
+
+def get_delivery_point(request):
+    if 'lat' in request.GET or 'lon' in request.GET:
+        try:
+            lat = float(request.GET['lat'])
+            lon = float(request.GET['lon'])
+        except (KeyError, ValueError):
+            raise ValueError('Expects both lat and lon')
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError('Invalid coordinates')
+        return lat, lon
+    if request.GET.get('address'):
+        coords = geocode(request.GET['address'])
+        if coords is None:
+            raise ValueError('Address not found')
+        return coords
+    return None
+
+
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'ingridients': product.ingridients,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            },
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
-            }
-        }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    representation = get_representation(request)
+    try:
+        delivery_point = get_delivery_point(request)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    restaurant_ids = None
+    if delivery_point:
+        restaurant_ids = get_delivering_restaurants(delivery_point)
+
+    if not any(param in request.GET for param in CATALOG_PAGE_PARAMS):
+        catalog_version = get_request_catalog_version(request)
+        if restaurant_ids is None:
+            snapshot = get_catalog_snapshot(catalog_version)
+        else:
+            snapshot = get_delivery_catalog_snapshot(
+                catalog_version, restaurant_ids)
+        return encoded_response(
+            representation, snapshot.bodies[representation])
+
+    try:
+        page_params = parse_catalog_page_params(request)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    products, next_after_id = get_catalog_page(
+        restaurant_ids=restaurant_ids, **page_params)
+    next_cursor = None
+    if next_after_id is not None:
+        next_cursor = urlsafe_base64_encode(str(next_after_id).encode())
+    page = {'results': products, 'next_cursor': next_cursor}
+    return encoded_response(representation, encode(page, representation))
+
+
+def product_changes_api(request):
+    if 'page' in request.GET:
+        page_cursor = decode_page_cursor(request.GET['page'])
+        if page_cursor is None:
+            return HttpResponseBadRequest('Invalid page cursor')
+        changes = get_full_catalog_page(*page_cursor)
+    else:
+        since = None
+        if 'since' in request.GET:
+            since = decode_cursor(request.GET['since'])
+            if since is None:
+                return HttpResponseBadRequest('Invalid cursor')
+        changes = get_catalog_changes(since)
+
+    representation = get_representation(request)
+    return encoded_response(representation, encode(changes, representation))
+
+
+def product_search_api(request):
+    try:
+        limit = int(request.GET.get('limit', settings.PRODUCT_SEARCH_LIMIT))
+    except ValueError:
+        return HttpResponseBadRequest('Invalid limit')
+    limit = max(1, min(limit, settings.PRODUCT_SEARCH_MAX_LIMIT))
+
+    products = search_index.search(request.GET.get('q', ''), limit)
+    representation = get_representation(request)
+    return encoded_response(representation, encode(products, representation))
 
 
 class OrderProductItemSerializer(ModelSerializer):
+    product = IntegerField(min_value=1)
+
     class Meta:
         model = OrderProductItem
         fields = ['product', 'quantity']
 
 
 class OrderSerializer(ModelSerializer):
-    products = OrderProductItemSerializer(many=True)
+    products = OrderProductItemSerializer(many=True, allow_empty=False)
 
     class Meta:
         model = Order
         fields = ['products', 'firstname', 'lastname', 'phonenumber', 'address']
 
 
+def get_missing_products_errors(product_ids, products):
+    return [
+        f'Недопустимый первичный ключ "{product_id}" - объект не существует.'
+        for product_id in sorted(set(product_ids) - products.keys())
+    ]
+
+
+def get_products(product_ids):
+    products = Product.objects.in_bulk(set(product_ids))
+    errors = get_missing_products_errors(product_ids, products)
+    if errors:
+        raise ValidationError({'products': errors})
+    return products
+
+
+def get_order_total(products_data, products):
+    return sum(
+        products[item['product']].price * item['quantity']
+        for item in products_data
+    )
+
+
+def build_order_items(order, products_data, products):
+    return [
+        OrderProductItem(
+            order=order,
+            product=products[item['product']],
+            quantity=item['quantity'],
+            product_total=products[item['product']].price * item['quantity'],
+        )
+        for item in products_data
+    ]
+
+
+def create_orders(orders_data, products):
+    orders = [
+        Order(
+            firstname=order_data['firstname'],
+            lastname=order_data.get('lastname', ''),
+            phonenumber=order_data['phonenumber'],
+            address=order_data['address'],
+            total=get_order_total(order_data['products'], products),
+        )
+        for order_data in orders_data
+    ]
+    if connection.features.can_return_rows_from_bulk_insert:
+        Order.objects.bulk_create(orders)
+    else:
+        for order in orders:
+            order.save()
+    publish_order_events(order.id for order in orders)
+
+    OrderProductItem.objects.bulk_create([
+        order_item
+        for order, order_data in zip(orders, orders_data)
+        for order_item in build_order_items(
+            order, order_data['products'], products)
+    ])
+    return orders
+
+
 @api_view(['POST'])
 @transaction.atomic
+@idempotent
 def register_order(request):
-    data = request.data
-    serializer = OrderSerializer(data=data)
+    serializer = OrderSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
+    order_data = serializer.validated_data
 
-    order = Order.objects.create(
-        firstname=serializer.validated_data['firstname'],
-        lastname=serializer.validated_data['lastname'],
-        phonenumber=serializer.validated_data['phonenumber'],
-        address=serializer.validated_data['address'],
-    )
+    products = get_products(
+        [item['product'] for item in order_data['products']])
+    create_orders([order_data], products)
 
-    if serializer.validated_data['products'] == []:
-        raise ValidationError('Expects not empty list of products')
+    return Response(serializer.data)
 
-    products = [(Product.objects.get(id=product['product']), product['quantity']) for product in data['products']]
 
-    for product, quantity in products:
-        OrderProductItem.objects.create(
-            order=order,
-            product=product,
-            quantity=quantity
-        )
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+def register_orders_batch(request):
+    if not isinstance(request.data, list):
+        raise ValidationError('Expects list of orders')
+    if len(request.data) > settings.ORDERS_BATCH_MAX_SIZE:
+        raise ValidationError(
+            f'Expects at most {settings.ORDERS_BATCH_MAX_SIZE} orders')
 
-    return Response(serializer.data)
+    results = [None] * len(request.data)
+    valid_orders = []
+    for index, data in enumerate(request.data):
+        if not isinstance(data, dict):
+            results[index] = {'status': 'error', 'errors': {
+                'non_field_errors': ['Expects JSON object']}}
+            continue
+        serializer = OrderSerializer(data=data)
+        if not serializer.is_valid():
+            results[index] = {'status': 'error', 'errors': serializer.errors}
+            continue
+        valid_orders.append((index, serializer.validated_data))
+
+    products = Product.objects.in_bulk({
+        item['product']
+        for _, order_data in valid_orders
+        for item in order_data['products']
+    })
+    orders_to_create = []
+    for index, order_data in valid_orders:
+        errors = get_missing_products_errors(
+            [item['product'] for item in order_data['products']], products)
+        if errors:
+            results[index] = {
+                'status': 'error', 'errors': {'products': errors}}
+            continue
+        orders_to_create.append((index, order_data))
+
+    chunk_size = settings.ORDERS_BATCH_CHUNK_SIZE
+    for start in range(0, len(orders_to_create), chunk_size):
+        chunk = orders_to_create[start:start + chunk_size]
+        try:
+            with transaction.atomic():
+                orders = create_orders(
+                    [order_data for _, order_data in chunk], products)
+        except DatabaseError:
+            for index, _ in chunk:
+                results[index] = {'status': 'error', 'errors': {
+                    'non_field_errors': ['Failed to save order']}}
+            continue
+        for (index, _), order in zip(chunk, orders):
+            results[index] = {'status': 'created', 'id': order.id}
+
+    return Response([
+        {'index': index, **result} for index, result in enumerate(results)
+    ])
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import Place
+
+
+@admin.register(Place)
+class PlaceAdmin(admin.ModelAdmin):
+    list_display = ['address', 'lat', 'lon', 'status', 'fetched_at']
+    list_filter = ['status']
+    search_fields = ['address']
@@ -0,0 +1,134 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+
+NOT_FOUND = 'not-found'
+_missing = object()
+
+
+class GeocodingCache:
+    def __init__(self, maxsize=1024, ttl=60 * 60 * 24 * 30,
+                 negative_ttl=60 * 60 * 24, cache_alias='default',
+                 key_prefix='geocoder', lock_timeout=10):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+        self.lock_timeout = lock_timeout
+
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.stats = dict.fromkeys(
+            ['lru_hits', 'shared_hits', 'negative_hits', 'misses', 'loads'], 0)
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def get(self, key, loader):
+        value = self._get_local(key)
+        if value is _missing:
+            value = self._get_shared(key)
+        if value is _missing:
+            value = self._load_once(key, loader)
+        if value == NOT_FOUND:
+            self._incr('negative_hits')
+            return None
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+
+    def _incr(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _ttl_for(self, value):
+        return self.negative_ttl if value == NOT_FOUND else self.ttl
+
+    def _get_local(self, key):
+        with self._lock:
+            item = self._lru.get(key)
+            if item is None:
+                return _missing
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._lru[key]
+                return _missing
+            self._lru.move_to_end(key)
+            self.stats['lru_hits'] += 1
+            return value
+
+    def _set_local(self, key, value):
+        with self._lock:
+            self._lru[key] = (value, time.monotonic() + self._ttl_for(value))
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def _shared_key(self, key, kind=''):
+        digest = hashlib.md5(key.encode()).hexdigest()
+        return f'{self.key_prefix}{kind}:{digest}'
+
+    def _get_shared(self, key):
+        value = self.shared.get(self._shared_key(key), _missing)
+        if value is not _missing:
+            self._incr('shared_hits')
+            self._set_local(key, value)
+        return value
+
+    def _set_shared(self, key, value):
+        self.shared.set(self._shared_key(key), value, self._ttl_for(value))
+
+    def _load_once(self, key, loader):
+        with self._lock:
+            self.stats['misses'] += 1
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait(self.lock_timeout)
+            value = self._get_local(key)
+            return None if value is _missing else value
+
+        try:
+            return self._load_shared_once(key, loader)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def _load_shared_once(self, key, loader):
+        lock_key = self._shared_key(key, kind='-lock')
+        deadline = time.monotonic() + self.lock_timeout
+        acquired = self.shared.add(lock_key, 1, self.lock_timeout)
+        while not acquired:
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+            value = self._get_shared(key)
+            if value is not _missing:
+                return value
+            acquired = self.shared.add(lock_key, 1, self.lock_timeout)
+
+        try:
+            self._incr('loads')
+            value = loader(key)
+            if value is None:
+                value = NOT_FOUND
+            self._set_shared(key, value)
+            self._set_local(key, value)
+            return value
+        finally:
+            # Не дождавшись блокировки, грузим сами, но чужую не снимаем
+            if acquired:
+                self.shared.delete(lock_key)
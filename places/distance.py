@@ -0,0 +1,43 @@
+import numpy as np
+from geopy import distance
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_array(coords):
+    return np.array(
+        [point if point else (np.nan, np.nan) for point in coords],
+        dtype=float,
+    ).reshape(-1, 2)
+
+
+def distance_matrix(origins, destinations):
+    origins = np.radians(to_array(origins))
+    destinations = np.radians(to_array(destinations))
+
+    lat1 = origins[:, 0][:, np.newaxis]
+    lon1 = origins[:, 1][:, np.newaxis]
+    lat2 = destinations[:, 0][np.newaxis, :]
+    lon2 = destinations[:, 1][np.newaxis, :]
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def refine_top_k(matrix, origins, destinations, k):
+    matrix = matrix.copy()
+    k = min(k, matrix.shape[1])
+    if not k:
+        return matrix
+    top_k = np.argpartition(matrix, k - 1, axis=1)[:, :k]
+    for row, columns in enumerate(top_k):
+        for column in columns:
+            if np.isnan(matrix[row, column]):
+                continue
+            matrix[row, column] = distance.distance(
+                origins[row], destinations[column]).km
+    return matrix
@@ -0,0 +1,206 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .cache import GeocodingCache
+from .models import Place, normalize_address
+
+
+class GeocoderError(Exception):
+    pass
+
+
+class YandexGeocoder:
+    base_url = "https://geocode-maps.yandex.ru/1.x"
+    retry_statuses = [429, 500, 502, 503, 504]
+
+    def __init__(self, apikey=None, base_url=None, timeout=None,
+                 retries=None, backoff_factor=None, max_workers=None):
+        self.apikey = apikey or settings.YANDEX_GEOCODER_APIKEY
+        self.base_url = base_url or self.base_url
+        self.timeout = timeout or settings.GEOCODER_TIMEOUT
+        self.retries = settings.GEOCODER_RETRIES if retries is None else retries
+        self.backoff_factor = (
+            backoff_factor or settings.GEOCODER_BACKOFF_FACTOR)
+        self.max_workers = max_workers or settings.GEOCODER_MAX_WORKERS
+
+        adapter = HTTPAdapter(pool_maxsize=self.max_workers)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Один пул на всё время жизни клиента: число потоков не растёт,
+        # сколько бы пачек ни пришло.
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix='geocoder')
+
+    def is_retryable(self, error):
+        if isinstance(error, requests.HTTPError):
+            return error.response.status_code in self.retry_statuses
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    def request_coordinates(self, place, timeout):
+        params = {"geocode": place, "apikey": self.apikey, "format": "json"}
+        response = self.session.get(
+            self.base_url, params=params, timeout=timeout)
+        response.raise_for_status()
+        try:
+            places_found = response.json(
+            )['response']['GeoObjectCollection']['featureMember']
+        except (KeyError, ValueError) as error:
+            raise GeocoderError(error) from error
+
+        if not places_found:
+            return None
+        most_relevant = places_found[0]
+        lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
+        return float(lat), float(lon)
+
+    def fetch_coordinates(self, place, deadline_at=None):
+        # Повторы сделаны вручную, а не через Retry из urllib3: так и
+        # таймаут запроса, и паузы между попытками укладываются в дедлайн.
+        for attempt in range(self.retries + 1):
+            timeout = self.timeout
+            if deadline_at is not None:
+                timeout = min(timeout, deadline_at - time.monotonic())
+                if timeout <= 0:
+                    raise GeocoderError(f'Истёк дедлайн для адреса: {place}')
+            try:
+                return self.request_coordinates(place, timeout)
+            except requests.RequestException as error:
+                if attempt == self.retries or not self.is_retryable(error):
+                    raise GeocoderError(error) from error
+            delay = self.backoff_factor * 2 ** attempt
+            if deadline_at is not None:
+                delay = min(delay, max(deadline_at - time.monotonic(), 0))
+            time.sleep(delay)
+
+    def fetch_many(self, places, deadline=None):
+        # Адреса, которые не удалось геокодировать до дедлайна, в ответ не попадают
+        deadline = deadline or settings.GEOCODER_BATCH_DEADLINE
+        deadline_at = time.monotonic() + deadline
+        futures = {
+            self.executor.submit(self.fetch_coordinates, place, deadline_at):
+            place
+            for place in set(places)
+        }
+        done, not_done = wait(futures, timeout=deadline)
+        for future in not_done:
+            future.cancel()
+
+        coordinates = {}
+        for future in done:
+            if future.exception() is None:
+                coordinates[futures[future]] = future.result()
+        return coordinates
+
+
+class FakeGeocoder:
+    def __init__(self, places=None):
+        self.places = {
+            normalize_address(address): coords
+            for address, coords in (places or {}).items()
+        }
+        self.calls = 0
+
+    def fetch_coordinates(self, place, deadline_at=None):
+        self.calls += 1
+        return self.places.get(normalize_address(place))
+
+    def fetch_many(self, places, deadline=None):
+        return {place: self.fetch_coordinates(place) for place in set(places)}
+
+
+_geocoder = None
+_cache = None
+
+
+def get_geocoder():
+    global _geocoder
+    if _geocoder is None:
+        _geocoder = import_string(settings.GEOCODER_BACKEND)()
+    return _geocoder
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = GeocodingCache(
+            maxsize=settings.GEOCODER_LRU_SIZE,
+            ttl=settings.GEOCODER_CACHE_TTL,
+            negative_ttl=settings.GEOCODER_NEGATIVE_CACHE_TTL,
+            cache_alias=settings.GEOCODER_CACHE_ALIAS,
+        )
+    return _cache
+
+
+def save_place(address, coords, status):
+    lat, lon = coords or (None, None)
+    place, _ = Place.objects.update_or_create(
+        address=normalize_address(address),
+        defaults={
+            'lat': lat,
+            'lon': lon,
+            'status': status,
+            'fetched_at': timezone.now(),
+        },
+    )
+    return place
+
+
+def geocode_place(address, geocoder=None):
+    geocoder = geocoder or get_geocoder()
+    try:
+        coords = geocoder.fetch_coordinates(address)
+    except GeocoderError:
+        return save_place(address, None, 'ERROR')
+    return save_place(address, coords, 'OK' if coords else 'NOT_FOUND')
+
+
+def geocode_many(addresses, geocoder=None):
+    geocoder = geocoder or get_geocoder()
+    normalized = {normalize_address(address) for address in addresses if address}
+    places = {
+        place.address: place
+        for place in Place.objects.filter(
+            address__in=normalized).exclude(status='ERROR')
+    }
+
+    missing = normalized - places.keys()
+    fetched = geocoder.fetch_many(missing) if missing else {}
+    for address in missing:
+        if address not in fetched:
+            places[address] = save_place(address, None, 'ERROR')
+            continue
+        coords = fetched[address]
+        places[address] = save_place(
+            address, coords, 'OK' if coords else 'NOT_FOUND')
+    return places
+
+
+def load_coordinates(address):
+    place = Place.objects.filter(address=address).first()
+    if not place or place.status == 'ERROR':
+        place = geocode_place(address)
+    if place.status == 'ERROR':
+        raise GeocoderError(f'Не удалось геокодировать адрес: {address}')
+    return place.coords
+
+
+def geocode(address):
+    if not address:
+        return None
+    try:
+        return get_cache().get(normalize_address(address), load_coordinates)
+    except GeocoderError:
+        return None
+
+
+def get_places_coords(addresses):
+    normalized = {normalize_address(address) for address in addresses}
+    places = Place.objects.filter(address__in=normalized, status='OK')
+    return {place.address: place.coords for place in places}
@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+
+from .distance import EARTH_RADIUS_KM, distance_matrix, refine_top_k
+
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class GridIndex:
+    # Точки раскладываются по ячейкам сетки со стороной cell_size_km
+    # по широте. Поиск в радиусе смотрит только соседние ячейки, поэтому
+    # его цена зависит от плотности точек, а не от их общего числа.
+    def __init__(self, cell_size_km):
+        self.cell_size = cell_size_km / KM_PER_DEGREE
+        self._cells = {}
+        self._points = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def get_cell(self, point):
+        lat, lon = point
+        return (
+            math.floor(lat / self.cell_size),
+            math.floor(lon / self.cell_size),
+        )
+
+    def add(self, key, point):
+        self.remove(key)
+        self._points[key] = point
+        self._cells.setdefault(self.get_cell(point), {})[key] = point
+
+    def remove(self, key):
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        cell = self.get_cell(point)
+        del self._cells[cell][key]
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    def get_neighbour_cells(self, point, radius_km):
+        row, column = self.get_cell(point)
+        lat_span = radius_km / KM_PER_DEGREE
+        max_lat = min(abs(point[0]) + lat_span, 89.0)
+        lon_span = lat_span / math.cos(math.radians(max_lat))
+        rows = math.ceil(lat_span / self.cell_size)
+        columns = math.ceil(lon_span / self.cell_size)
+        return [
+            (row + row_offset, column + column_offset)
+            for row_offset in range(-rows, rows + 1)
+            for column_offset in range(-columns, columns + 1)
+        ]
+
+    def get_candidates(self, point, radius_km):
+        candidates = {}
+        for cell in self.get_neighbour_cells(point, radius_km):
+            candidates.update(self._cells.get(cell, {}))
+        return candidates
+
+    def nearby(self, point, radius_km):
+        candidates = self.get_candidates(point, radius_km)
+        if not candidates:
+            return {}
+        distances = distance_matrix([point], list(candidates.values()))[0]
+        return {
+            key: float(distance_km)
+            for key, distance_km in zip(candidates, distances)
+            if distance_km <= radius_km
+        }
+
+    def nearest(self, point, radius_km, k=None, predicate=None,
+                geodesic=False):
+        distances = sorted(
+            self.nearby(point, radius_km).items(), key=lambda item: item[1])
+        if predicate:
+            distances = [
+                (key, distance_km) for key, distance_km in distances
+                if predicate(key)
+            ]
+        distances = distances[:k] if k else distances
+        if geodesic and distances:
+            distances = self.refine(point, distances)
+        return distances
+
+    def refine(self, point, distances):
+        # Гаверсинус ошибается до 0.5%: для уже отобранных точек
+        # пересчитываем расстояние точной формулой на эллипсоиде.
+        keys = [key for key, _ in distances]
+        matrix = np.array([[distance_km for _, distance_km in distances]])
+        refined = refine_top_k(
+            matrix, [point], [self._points[key] for key in keys], len(keys))
+        return sorted(
+            zip(keys, map(float, refined[0])), key=lambda item: item[1])
@@ -0,0 +1,47 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from geopy import distance
+
+from places.distance import distance_matrix, refine_top_k
+
+
+def random_point():
+    return random.uniform(55.5, 56.0), random.uniform(37.3, 37.9)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает расчёт расстояний через geopy и матрицей NumPy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--restaurants', type=int, default=200)
+        parser.add_argument('--top-k', type=int, default=5)
+
+    def handle(self, *args, **options):
+        orders = [random_point() for _ in range(options['orders'])]
+        restaurants = [random_point() for _ in range(options['restaurants'])]
+
+        started_at = time.perf_counter()
+        for order in orders:
+            for restaurant in restaurants:
+                distance.distance(restaurant, order).km
+        geopy_time = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        matrix = distance_matrix(orders, restaurants)
+        numpy_time = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        refine_top_k(matrix, orders, restaurants, options['top_k'])
+        refine_time = time.perf_counter() - started_at
+
+        self.stdout.write(
+            f"{options['orders']} заказов × {options['restaurants']} ресторанов")
+        self.stdout.write(f'geopy, попарно: {geopy_time:.3f} с')
+        self.stdout.write(f'NumPy, матрица: {numpy_time:.3f} с')
+        self.stdout.write(
+            f"NumPy + geodesic для top-{options['top_k']}: "
+            f'{numpy_time + refine_time:.3f} с')
+        self.stdout.write(f'ускорение: {geopy_time / numpy_time:.0f}×')
@@ -0,0 +1,35 @@
+from django.db import models
+from django.utils import timezone
+
+
+def normalize_address(address):
+    return ' '.join(address.split()).lower()
+
+
+class Place(models.Model):
+    STATUS = [
+        ('OK', 'Найдено'),
+        ('NOT_FOUND', 'Не найдено'),
+        ('ERROR', 'Ошибка геокодера'),
+    ]
+
+    address = models.CharField('адрес', max_length=100, unique=True)
+    lat = models.FloatField('широта', null=True, blank=True)
+    lon = models.FloatField('долгота', null=True, blank=True)
+    status = models.CharField(
+        'статус', max_length=9, choices=STATUS, default='OK', db_index=True)
+    fetched_at = models.DateTimeField(
+        'время запроса к геокодеру', default=timezone.now)
+
+    def __str__(self):
+        return self.address
+
+    @property
+    def coords(self):
+        if self.lat is None or self.lon is None:
+            return None
+        return self.lat, self.lon
+
+    class Meta:
+        verbose_name = 'место'
+        verbose_name_plural = 'места'
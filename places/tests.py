@@ -0,0 +1,247 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from geopy import distance
+
+from .cache import GeocodingCache
+from .distance import distance_matrix
+from .geocoder import FakeGeocoder, GeocoderError, YandexGeocoder
+from .grid import GridIndex
+
+
+def brute_force_nearest(point, points, radius_km, k=None, predicate=None):
+    distances = distance_matrix([point], list(points.values()))[0]
+    nearby = sorted(
+        (distance_km, key)
+        for key, distance_km in zip(points, distances)
+        if distance_km <= radius_km and (predicate is None or predicate(key))
+    )
+    return [key for _, key in nearby[:k]]
+
+
+class GridIndexTest(SimpleTestCase):
+    radius_km = 3
+
+    def setUp(self):
+        self.random = random.Random(0)
+        self.points = {
+            key: self.random_point() for key in range(1, 2001)
+        }
+        self.grid = GridIndex(cell_size_km=self.radius_km)
+        for key, point in self.points.items():
+            self.grid.add(key, point)
+
+    def random_point(self):
+        return (
+            self.random.uniform(55.5, 56.0),
+            self.random.uniform(37.3, 37.9),
+        )
+
+    def assert_matches_brute_force(self, k=None, predicate=None):
+        for _ in range(200):
+            point = self.random_point()
+            found = [
+                key for key, _ in self.grid.nearest(
+                    point, self.radius_km, k, predicate)
+            ]
+            self.assertEqual(found, brute_force_nearest(
+                point, self.points, self.radius_km, k, predicate))
+
+    def test_nearest_matches_brute_force(self):
+        self.assert_matches_brute_force()
+        self.assert_matches_brute_force(k=10)
+
+    def test_nearest_with_predicate(self):
+        self.assert_matches_brute_force(
+            k=5, predicate=lambda key: key % 3 == 0)
+
+    def test_nearest_with_geodesic_distances(self):
+        for _ in range(50):
+            point = self.random_point()
+            found = self.grid.nearest(point, self.radius_km, 5, geodesic=True)
+            approximate = self.grid.nearest(point, self.radius_km, 5)
+            self.assertEqual(
+                {key for key, _ in found}, {key for key, _ in approximate})
+            self.assertEqual(
+                [distance_km for _, distance_km in found],
+                sorted(distance_km for _, distance_km in found))
+            for key, distance_km in found:
+                self.assertAlmostEqual(
+                    distance_km,
+                    distance.distance(point, self.points[key]).km)
+
+    def test_nearest_after_moves_and_removals(self):
+        for key in self.random.sample(list(self.points), 200):
+            self.points[key] = self.random_point()
+            self.grid.add(key, self.points[key])
+        for key in self.random.sample(list(self.points), 200):
+            del self.points[key]
+            self.grid.remove(key)
+
+        self.assertEqual(len(self.grid), len(self.points))
+        self.assert_matches_brute_force(k=10)
+
+
+@override_settings(CACHES={
+    'geocoder': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'geocoding-cache-test',
+    },
+})
+class GeocodingCacheTest(SimpleTestCase):
+    address = 'москва, новый арбат 10'
+    coords = (55.752, 37.588)
+
+    def setUp(self):
+        caches['geocoder'].clear()
+        self.geocoder = FakeGeocoder({self.address: self.coords})
+
+    def make_cache(self, **kwargs):
+        return GeocodingCache(cache_alias='geocoder', **kwargs)
+
+    def load(self, key):
+        return self.geocoder.fetch_coordinates(key)
+
+    def test_lru_hit(self):
+        cache = self.make_cache()
+        self.assertEqual(cache.get(self.address, self.load), self.coords)
+        self.assertEqual(cache.get(self.address, self.load), self.coords)
+        self.assertEqual(cache.stats['loads'], 1)
+        self.assertEqual(cache.stats['lru_hits'], 1)
+        self.assertEqual(self.geocoder.calls, 1)
+
+    def test_shared_hit(self):
+        self.make_cache().get(self.address, self.load)
+        other_process_cache = self.make_cache()
+        self.assertEqual(
+            other_process_cache.get(self.address, self.load), self.coords)
+        self.assertEqual(other_process_cache.stats['shared_hits'], 1)
+        self.assertEqual(other_process_cache.stats['loads'], 0)
+        self.assertEqual(self.geocoder.calls, 1)
+
+    def test_negative_caching(self):
+        cache = self.make_cache()
+        self.assertIsNone(cache.get('нигде', self.load))
+        self.assertIsNone(cache.get('нигде', self.load))
+        self.assertIsNone(self.make_cache().get('нигде', self.load))
+        self.assertEqual(cache.stats['negative_hits'], 2)
+        self.assertEqual(self.geocoder.calls, 1)
+
+    def test_concurrent_misses_load_once(self):
+        def slow_load(key):
+            time.sleep(0.2)
+            return self.load(key)
+
+        process_caches = [self.make_cache(), self.make_cache()]
+        results = []
+        threads = [
+            threading.Thread(target=lambda cache=cache: results.append(
+                cache.get(self.address, slow_load)))
+            for cache in process_caches
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [self.coords] * 8)
+        self.assertEqual(
+            sum(cache.stats['loads'] for cache in process_caches), 1)
+        self.assertEqual(self.geocoder.calls, 1)
+
+    def test_expired_lock_wait_keeps_foreign_lock(self):
+        cache = self.make_cache(lock_timeout=0.1)
+        lock_key = cache._shared_key(self.address, kind='-lock')
+        caches['geocoder'].add(lock_key, 1, 60)
+
+        self.assertEqual(cache.get(self.address, self.load), self.coords)
+        self.assertEqual(caches['geocoder'].get(lock_key), 1)
+
+
+class StubGeocoderHandler(BaseHTTPRequestHandler):
+    # «flaky» сначала отвечает 503, «slow» отвечает через секунду
+    def do_GET(self):
+        place = parse_qs(urlparse(self.path).query)['geocode'][0]
+        self.server.requests.append(place)
+        if place == 'flaky' and self.server.requests.count(place) == 1:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if place == 'slow':
+            time.sleep(1)
+        body = json.dumps({'response': {'GeoObjectCollection': {
+            'featureMember': [
+                {'GeoObject': {'Point': {'pos': '37.588 55.752'}}},
+            ],
+        }}}).encode()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(body)
+        except ConnectionError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class YandexGeocoderTest(SimpleTestCase):
+    coords = (55.752, 37.588)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGeocoderHandler)
+        cls.server.daemon_threads = True
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever)
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.server_thread.join()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests = []
+
+    def make_geocoder(self, **kwargs):
+        host, port = self.server.server_address
+        kwargs.setdefault('backoff_factor', 0.01)
+        return YandexGeocoder(
+            apikey='test', base_url=f'http://{host}:{port}/', **kwargs)
+
+    def test_retries_server_errors(self):
+        geocoder = self.make_geocoder(retries=2)
+        self.assertEqual(geocoder.fetch_coordinates('flaky'), self.coords)
+        self.assertEqual(self.server.requests, ['flaky', 'flaky'])
+
+    def test_gives_up_without_retries(self):
+        geocoder = self.make_geocoder(retries=0)
+        with self.assertRaises(GeocoderError):
+            geocoder.fetch_coordinates('flaky')
+
+    def test_request_timeout(self):
+        geocoder = self.make_geocoder(timeout=0.2, retries=0)
+        started_at = time.monotonic()
+        with self.assertRaises(GeocoderError):
+            geocoder.fetch_coordinates('slow')
+        self.assertLess(time.monotonic() - started_at, 0.9)
+
+    def test_fetch_many_deadline(self):
+        geocoder = self.make_geocoder(timeout=5, retries=3)
+        started_at = time.monotonic()
+        coordinates = geocoder.fetch_many(
+            ['slow', 'fast', 'flaky'], deadline=0.5)
+        self.assertLess(time.monotonic() - started_at, 0.9)
+        self.assertEqual(
+            coordinates, {'fast': self.coords, 'flaky': self.coords})
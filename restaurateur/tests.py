@@ -1,3 +1,49 @@
-from django.test import TestCase
+import time
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from foodcartapp.models import Order, OrderEvent
+
+
+@override_settings(ORDER_EVENTS_POLL_INTERVAL=0.05)
+class OrderEventsTest(TestCase):
+    events_url = '/manager/orders/events/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(
+            'manager', password='password', is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def read_stream(self, **headers):
+        started_at = time.monotonic()
+        response = self.client.get(
+            self.events_url, {'last_event_id': 0}, **headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        return body, time.monotonic() - started_at
+
+    @override_settings(ORDER_EVENTS_STREAM_TIMEOUT=0.2)
+    def test_idle_stream_closes_with_retry_hint(self):
+        body, elapsed = self.read_stream()
+        self.assertEqual(body, 'retry: 2000\n\n')
+        self.assertLess(elapsed, 1)
+
+    @override_settings(ORDER_EVENTS_STREAM_TIMEOUT=2)
+    def test_stream_closes_after_first_events(self):
+        order = Order.objects.create(
+            firstname='Иван', phonenumber='+79291000000',
+            address='Москва, Новый Арбат, 10')
+        OrderEvent.objects.create(order_id=order.id)
+
+        body, elapsed = self.read_stream()
+        self.assertLess(elapsed, 1)
+        self.assertIn('event: order', body)
+        self.assertIn(f'"id": {order.id}', body)
+
+        body, _ = self.read_stream(
+            HTTP_LAST_EVENT_ID=body.split('id: ')[1].split('\n')[0])
+        self.assertNotIn('event: order', body)
@@ -1,19 +1,25 @@
 from django import forms
+from django.http import StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 from django.views import View
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import views as auth_views
-from foodcartapp.models import Product, Restaurant, Order
+from foodcartapp.delivery import restaurant_locations
+from foodcartapp.menu_index import covers, menu_index, products_mask
+from foodcartapp.order_events import get_events_after, get_last_event_id
+from foodcartapp.models import Product, ProductCategory, Restaurant, Order
+from foodcartapp.models import RestaurantMenuItem
+from places.geocoder import get_places_coords
+from places.models import normalize_address
 
-from django.core.cache import cache
-import requests
-from geopy import distance
-from operator import itemgetter
-from environs import Env
-env = Env()
-env.read_env()
+import json
+import time
 
 
 class Login(forms.Form):
@@ -68,29 +74,82 @@ def is_manager(user):
     return user.is_staff  # FIXME replace with specific permission
 
 
+def get_availability_masks(product_ids, restaurant_columns):
+    masks = dict.fromkeys(product_ids, 0)
+    menu_items = RestaurantMenuItem.objects.filter(
+        product_id__in=product_ids, restaurant_id__in=restaurant_columns,
+        availability=True,
+    ).values_list('product_id', 'restaurant_id')
+    for product_id, restaurant_id in menu_items:
+        masks[product_id] |= 1 << restaurant_columns[restaurant_id]
+    return masks
+
+
+def decode_product_cursor(cursor):
+    try:
+        return int(urlsafe_base64_decode(cursor).decode())
+    except ValueError:
+        return None
+
+
+def parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_products(request):
-    restaurants = list(Restaurant.objects.order_by('name'))
-    products = list(Product.objects.prefetch_related('menu_items'))
+    category_id = parse_id(request.GET.get('category'))
+    restaurant_id = parse_id(request.GET.get('restaurant'))
 
-    default_availability = {restaurant.id: False for restaurant in restaurants}
-    products_with_restaurants = []
-    for product in products:
+    restaurants = Restaurant.objects.order_by('name')
+    products = Product.objects.select_related('category').only(
+        'name', 'price', 'image', 'image_hash', 'category__name',
+    ).order_by('id')
+    if category_id:
+        products = products.filter(category_id=category_id)
+    if restaurant_id:
+        restaurants = restaurants.filter(id=restaurant_id)
+        products = products.filter(menu_items__restaurant_id=restaurant_id)
+    restaurants = list(restaurants.values('id', 'name'))
 
-        availability = {
-            **default_availability,
-            **{item.restaurant_id: item.availability for item in product.menu_items.all()},
-        }
-        orderer_availability = [availability[restaurant.id]
-                                for restaurant in restaurants]
+    after_id = decode_product_cursor(request.GET.get('cursor', ''))
+    if after_id:
+        products = products.filter(id__gt=after_id)
 
-        products_with_restaurants.append(
-            (product, orderer_availability)
-        )
+    page_size = get_page_size(
+        request, settings.PRODUCTS_PAGE_SIZE, settings.PRODUCTS_MAX_PAGE_SIZE)
+    products = list(products[:page_size + 1])
+    next_cursor = None
+    if len(products) > page_size:
+        products = products[:page_size]
+        next_cursor = urlsafe_base64_encode(str(products[-1].id).encode())
+
+    restaurant_columns = {
+        restaurant['id']: column
+        for column, restaurant in enumerate(restaurants)
+    }
+    masks = get_availability_masks(
+        [product.id for product in products], restaurant_columns)
+    products_with_restaurants = [
+        (product, [
+            bool(masks[product.id] >> column & 1)
+            for column in range(len(restaurants))
+        ])
+        for product in products
+    ]
 
     return render(request, template_name="products_list.html", context={
         'products_with_restaurants': products_with_restaurants,
         'restaurants': restaurants,
+        'categories': ProductCategory.objects.order_by('name'),
+        'all_restaurants': Restaurant.objects.order_by('name').only('name'),
+        'category_id': category_id,
+        'restaurant_id': restaurant_id,
+        'page_size': page_size,
+        'next_cursor': next_cursor,
     })
 
 
@@ -101,57 +160,79 @@ def view_restaurants(request):
     })
 
 
-def fetch_coordinates(apikey, place):
-    base_url = "https://geocode-maps.yandex.ru/1.x"
-    params = {"geocode": place, "apikey": apikey, "format": "json"}
-    response = requests.get(base_url, params=params)
-    response.raise_for_status()
-    places_found = response.json(
-    )['response']['GeoObjectCollection']['featureMember']
-    most_relevant = places_found[0]
-    lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
-    return lon, lat
+def encode_cursor(order):
+    cursor = f'{order.registrated_at.isoformat()}|{order.id}'
+    return urlsafe_base64_encode(cursor.encode())
 
 
-def serialize_restaurants(restaurants, apikey):
-    serialized_restaurants = []
-    for restaurant in restaurants:
-        serialized_restaurants.append(
-            {
-                'name': restaurant.name,
-                'menu_items': [menu_item.product.name for menu_item in restaurant.menu_items.all() if menu_item.availability],
-                'coords': cache.get_or_set(f'restaurant-{restaurant.id}', fetch_coordinates(apikey, restaurant.address), 60*15)
-            }
-        )
-    return serialized_restaurants
+def decode_cursor(cursor):
+    try:
+        registrated_at, order_id = urlsafe_base64_decode(
+            cursor).decode().split('|')
+        registrated_at = parse_datetime(registrated_at)
+        order_id = int(order_id)
+    except ValueError:
+        return None
+    if registrated_at is None:
+        return None
+    return registrated_at, order_id
 
 
-@user_passes_test(is_manager, login_url='restaurateur:login')
-def view_orders(request):
-    apikey = env('APIKEY')
-    orders = Order.objects.all()
-    orders_items = []
-    restaurants = Restaurant.objects.all()
+def get_page_size(request, default_size, max_size):
+    try:
+        page_size = int(request.GET.get('page_size', default_size))
+    except ValueError:
+        page_size = default_size
+    return max(1, min(page_size, max_size))
+
+
+def filter_orders(orders, status):
+    if status == 'all':
+        return orders, status
+    if status in dict(Order.STATUS):
+        return orders.filter(status=status), status
+    return orders.actionable(), ''
+
+
+def get_possible_restaurants(coords, product_ids, restaurant_names, masks):
+    order_mask = products_mask(product_ids)
+    if not coords:
+        return [
+            {'name': restaurant_names[restaurant_id], 'distance': None}
+            for restaurant_id, mask in sorted(masks.items())
+            if covers(mask, order_mask) and restaurant_id in restaurant_names
+        ]
+    nearest_restaurants = restaurant_locations.nearest(
+        coords, settings.DELIVERY_RADIUS_KM,
+        k=settings.ORDER_RESTAURANTS_LIMIT,
+        predicate=lambda restaurant_id: covers(
+            masks.get(restaurant_id, 0), order_mask),
+    )
+    return [
+        {
+            'name': restaurant_names[restaurant_id],
+            'distance': round(distance_km, 2),
+        }
+        for restaurant_id, distance_km in nearest_restaurants
+        if restaurant_id in restaurant_names
+    ]
 
+
+def serialize_orders(orders):
+    restaurant_names = dict(Restaurant.objects.values_list('id', 'name'))
+    places_coords = get_places_coords([order.address for order in orders])
+    masks = menu_index.get_masks()
+
+    orders_items = []
     for order in orders:
-        serialized_restaurants = serialize_restaurants(restaurants, apikey)
-        order_items = set(
-            [item.product.name for item in order.order_items.all()])
-        order_coords = cache.get_or_set(
-            f'order-{order.id}', fetch_coordinates(apikey, order.address), 30)
-        possible_restaurants = []
-        for restaurant in serialized_restaurants:
-            restaurant['distance'] = round(distance.distance(
-                restaurant['coords'], order_coords).km, 2)
-            if order_items.issubset(restaurant['menu_items']):
-                possible_restaurants.append(restaurant)
-
-        sorted_possible_restaurants = sorted(
-            possible_restaurants, key=itemgetter('distance'))
+        possible_restaurants = get_possible_restaurants(
+            places_coords.get(normalize_address(order.address)),
+            [item.product_id for item in order.order_items.all()],
+            restaurant_names, masks)
 
         order_info = {
             'id': order.id,
-            'cart_total': order.cart_total['cart_total'],
+            'cart_total': order.total,
             'firstname': order.firstname,
             'lastname': order.lastname,
             'phonenumber': order.phonenumber,
@@ -159,10 +240,93 @@ def view_orders(request):
             'status': order.get_status_display(),
             'comment': order.comment,
             'payment_method': order.get_payment_method_display(),
-            'restaurants': sorted_possible_restaurants,
+            'restaurants': possible_restaurants,
+            'restaurant': order.restaurant,
         }
         orders_items.append(order_info)
+    return orders_items
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_orders(request):
+    orders, status = filter_orders(
+        Order.objects.order_by('registrated_at', 'id'),
+        request.GET.get('status', ''))
+
+    cursor = decode_cursor(request.GET.get('cursor', ''))
+    if cursor:
+        orders = orders.seek(*cursor)
+
+    page_size = get_page_size(
+        request, settings.ORDERS_PAGE_SIZE, settings.ORDERS_MAX_PAGE_SIZE)
+    last_event_id = get_last_event_id()
+    orders = list(orders.select_related('restaurant').prefetch_related(
+        'order_items')[:page_size + 1])
+    next_cursor = None
+    if len(orders) > page_size:
+        orders = orders[:page_size]
+        next_cursor = encode_cursor(orders[-1])
 
     return render(request, template_name='order_items.html', context={
-        'order_items': orders_items,
+        'order_items': serialize_orders(orders),
+        'status': status,
+        'statuses': Order.STATUS,
+        'page_size': page_size,
+        'next_cursor': next_cursor,
+        'next_url': request.get_full_path(),
+        'last_event_id': last_event_id,
     })
+
+
+def stream_order_events(last_event_id, status):
+    # Короткий long polling: ответ закрывается сразу после первой пачки
+    # событий или через ORDER_EVENTS_STREAM_TIMEOUT секунд, и EventSource
+    # переподключается через retry. Так открытая менеджерка не держит
+    # воркер сервера всё время, пока открыта вкладка.
+    yield f'retry: {settings.ORDER_EVENTS_RETRY_MS}\n\n'
+    next_url = f'{reverse("restaurateur:view_orders")}?status={status}'
+    deadline = time.monotonic() + settings.ORDER_EVENTS_STREAM_TIMEOUT
+    while True:
+        events = get_events_after(last_event_id)
+        if events:
+            break
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(settings.ORDER_EVENTS_POLL_INTERVAL)
+
+    last_event_id = events[-1][0]
+    order_ids = {order_id for _, order_id in events}
+    orders, _ = filter_orders(Order.objects.filter(id__in=order_ids), status)
+    orders_items = {
+        order_item['id']: order_item
+        for order_item in serialize_orders(
+            list(orders.select_related('restaurant').prefetch_related(
+                'order_items')))
+    }
+    for order_id in sorted(order_ids):
+        html = None
+        if order_id in orders_items:
+            html = render_to_string('order_row.html', {
+                'item': orders_items[order_id],
+                'next_url': next_url,
+            })
+        data = json.dumps({'id': order_id, 'html': html})
+        yield f'id: {last_event_id}\nevent: order\ndata: {data}\n\n'
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_order_events(request):
+    last_event_id = request.META.get(
+        'HTTP_LAST_EVENT_ID', request.GET.get('last_event_id'))
+    try:
+        last_event_id = int(last_event_id)
+    except (TypeError, ValueError):
+        last_event_id = get_last_event_id()
+    _, status = filter_orders(Order.objects.all(), request.GET.get('status', ''))
+
+    response = StreamingHttpResponse(
+        stream_order_events(last_event_id, status),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response